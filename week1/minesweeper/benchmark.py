@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+
+from minesweeper import MinesweeperAI
+from simulate import play_game
+
+GAMES = 100
+BOARDS = [
+    (8, 8, 8),
+    (16, 16, 40),
+]
+
+
+class UniformAI(MinesweeperAI):
+    """
+    MinesweeperAI that guesses uniformly at random, for comparison.
+    """
+
+    def make_random_move(self):
+        cells = [
+            (i, j) for i in range(self.height) for j in range(self.width)
+            if (i, j) not in self.moves_made and (i, j) not in self.mines
+        ]
+        return random.choice(cells) if cells else None
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else GAMES
+
+    for height, width, mines in BOARDS:
+        print(f"{height}x{width}, {mines} mines, {games} games")
+        for name, ai_class, solver in [
+            ("uniform guesses, subset solver", UniformAI, "subset"),
+            ("probabilistic guesses, subset solver", MinesweeperAI, "subset"),
+            ("probabilistic guesses, linear solver", MinesweeperAI, "linear"),
+        ]:
+            start = time.perf_counter()
+            results = [
+                play_game(ai_class, height, width, mines, seed, solver)
+                for seed in range(games)
+            ]
+            elapsed = time.perf_counter() - start
+            wins = sum(r["won"] for r in results)
+            guesses = sum(r["guesses"] for r in results)
+            guess_seconds = sum(r["guess_seconds"] for r in results)
+            latencies = [t for r in results for t in r["latencies"]]
+            print(f"  {name}:")
+            print(f"    win rate: {wins / games:.1%}")
+            print(f"    guesses per game: {guesses / games:.2f}")
+            print(f"    games/s: {games / elapsed:.1f}")
+            print(f"    guesses/s: {guesses / guess_seconds:.1f}")
+            print(f"    mean move latency: "
+                  f"{sum(latencies) / len(latencies) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import math
+import time
+
+# Stop enumerating a component after this many seconds per guess
+TIME_BUDGET = 0.5
+
+# Number of solved components kept between guesses
+CACHE_SIZE = 256
+
+
+class Timeout(Exception):
+    """
+    Raised when enumeration runs past its deadline.
+    """
+
+
+def components(constraints):
+    """
+    Split a list of `(cells, count)` constraints into independent groups.
+    Two constraints belong to the same group if they share a cell
+    (directly or through other constraints).
+    Returns a list of lists of constraints.
+    """
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in constraints:
+        cells = list(cells)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        root = find(cells[0])
+        for cell in cells[1:]:
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    groups = {}
+    for constraint in constraints:
+        root = find(next(iter(constraint[0])))
+        groups.setdefault(root, []).append(constraint)
+    return list(groups.values())
+
+
+def enumerate_component(constraints, deadline):
+    """
+    Enumerate every mine configuration consistent with `constraints`.
+
+    Returns a dictionary mapping a number of mines `k` to a pair
+    `(ways, counts)`, where `ways` is the number of configurations with
+    exactly `k` mines and `counts` maps each cell to the number of those
+    configurations in which it is a mine.
+
+    Raises Timeout if `deadline` (a time.perf_counter value) passes.
+    """
+
+    # Order cells so that each constraint closes as early as possible
+    order = []
+    seen = set()
+    for cells, _ in sorted(constraints, key=lambda c: len(c[0])):
+        for cell in sorted(cells):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+
+    # For each constraint keep the mines still needed and cells still open
+    need = [count for _, count in constraints]
+    left = [len(cells) for cells, _ in constraints]
+    touching = [[] for _ in order]
+    position = {cell: i for i, cell in enumerate(order)}
+    for c, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            touching[position[cell]].append(c)
+
+    results = {}
+    assignment = [False] * len(order)
+    tried = [0] * len(order)
+    mines = 0
+
+    def advance(i):
+        """
+        Give cell i its next value, False first, undoing the one it had.
+        Return False once both values have been tried.
+        """
+        nonlocal mines
+        if tried[i]:
+            is_mine = assignment[i]
+            mines -= is_mine
+            for c in touching[i]:
+                left[c] += 1
+                if is_mine:
+                    need[c] += 1
+        while tried[i] < 2:
+            is_mine = tried[i] == 1
+            tried[i] += 1
+            ok = True
+            for c in touching[i]:
+                left[c] -= 1
+                if is_mine:
+                    need[c] -= 1
+                if need[c] < 0 or need[c] > left[c]:
+                    ok = False
+            if ok:
+                assignment[i] = is_mine
+                mines += is_mine
+                return True
+            for c in touching[i]:
+                left[c] += 1
+                if is_mine:
+                    need[c] += 1
+        tried[i] = 0
+        assignment[i] = False
+        return False
+
+    # Depth-first search with an explicit path rather than recursion,
+    # since a frontier can be longer than the recursion limit
+    nodes = 0
+    i = 0
+    while True:
+        nodes += 1
+        if nodes % 1024 == 0 and time.perf_counter() > deadline:
+            raise Timeout()
+        if i == len(order):
+            ways, counts = results.get(mines, (0, [0] * len(order)))
+            for j, is_mine in enumerate(assignment):
+                if is_mine:
+                    counts[j] += 1
+            results[mines] = (ways + 1, counts)
+            i -= 1
+        while i >= 0 and not advance(i):
+            i -= 1
+        if i < 0:
+            break
+        i += 1
+
+    return {
+        k: (ways, dict(zip(order, counts)))
+        for k, (ways, counts) in results.items()
+    }
+
+
+def convolve(a, b):
+    """
+    Combine two distributions over numbers of mines
+    (dictionaries mapping mine count to number of ways).
+    """
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def local_probabilities(constraints, density):
+    """
+    Cheap fallback estimate: a cell is as likely to be a mine as the most
+    pessimistic constraint it appears in says.
+    """
+    probabilities = {}
+    for cells, count in constraints:
+        p = count / len(cells)
+        for cell in cells:
+            probabilities[cell] = max(probabilities.get(cell, density), p)
+    return probabilities
+
+
+def mine_probabilities(constraints, unconstrained, mines, cache=None,
+                       budget=TIME_BUDGET):
+    """
+    Compute the probability that each unknown cell is a mine.
+
+    `constraints` is a list of `(cells, count)` pairs over unknown cells,
+    `unconstrained` is the set of unknown cells not in any constraint, and
+    `mines` is the number of mines not yet identified.
+    `cache`, if given, is a dictionary used to remember the enumeration of
+    components between calls.
+
+    Returns a dictionary mapping every unknown cell to its probability.
+    """
+    constraints = list({
+        (frozenset(cells), count) for cells, count in constraints if cells
+    })
+    unconstrained = list(unconstrained)
+    frontier_size = len(set().union(*(c[0] for c in constraints)))
+    unknown = frontier_size + len(unconstrained)
+    density = mines / unknown if unknown else 0
+
+    # Enumerate each independent part of the frontier separately
+    deadline = time.perf_counter() + budget
+    solved = []
+    try:
+        for group in components(constraints):
+            key = frozenset(group)
+            if cache is not None and key in cache:
+                solved.append(cache[key])
+                continue
+            result = enumerate_component(group, deadline)
+            if cache is not None:
+                if len(cache) >= CACHE_SIZE:
+                    cache.pop(next(iter(cache)))
+                cache[key] = result
+            solved.append(result)
+    except Timeout:
+        probabilities = local_probabilities(constraints, density)
+        for cell in unconstrained:
+            probabilities[cell] = density
+        return probabilities
+
+    # Weight each total number of frontier mines by the number of ways
+    # to place the remaining mines among the unconstrained cells
+    def weight(k):
+        rest = mines - k
+        if rest < 0 or rest > len(unconstrained):
+            return 0
+        return math.comb(len(unconstrained), rest)
+
+    distributions = [
+        {k: ways for k, (ways, _) in result.items()} for result in solved
+    ]
+    total = {0: 1}
+    for distribution in distributions:
+        total = convolve(total, distribution)
+    z = sum(ways * weight(k) for k, ways in total.items())
+    if z == 0:
+        probabilities = local_probabilities(constraints, density)
+        for cell in unconstrained:
+            probabilities[cell] = density
+        return probabilities
+
+    probabilities = {}
+    for i, result in enumerate(solved):
+        others = {0: 1}
+        for j, distribution in enumerate(distributions):
+            if j != i:
+                others = convolve(others, distribution)
+        component = {}
+        for k, (_, counts) in result.items():
+            w = sum(ways * weight(k + rest) for rest, ways in others.items())
+            for cell, count in counts.items():
+                component[cell] = component.get(cell, 0) + count * w
+        for cell, value in component.items():
+            probabilities[cell] = value / z
+
+    if unconstrained:
+        expected = sum(
+            ways * weight(k) * (mines - k) for k, ways in total.items()
+        )
+        p = expected / (z * len(unconstrained))
+        for cell in unconstrained:
+            probabilities[cell] = p
+
+    return probabilities
@@ -0,0 +1,184 @@
+import numpy as np
+
+# Coefficients smaller than this are treated as zero
+EPSILON = 1e-9
+
+
+class LinearSolver():
+    """
+    Minesweeper constraints kept as a linear system A x = b over the
+    unknown cells, where x is 1 for a mine and 0 for a safe cell.
+    The system is kept in reduced row echelon form and updated one row
+    at a time, so deductions can combine any number of sentences.
+
+    Cells are identified by their bit positions (see minesweeper.cell_bit),
+    and passed in and out as bitmasks. Only cells still unknown have a
+    column: `assign` drops the columns of cells it substitutes.
+    """
+
+    def __init__(self):
+
+        # Column of the matrix used by each cell, and the reverse
+        self.columns = {}
+        self.bits = []
+
+        # Matrix rows, right-hand side, and pivot column of each row;
+        # only the first `self.rows` rows of the arrays are in use
+        self.a = np.zeros((16, 16))
+        self.b = np.zeros(16)
+        self.pivots = []
+        self.rows = 0
+
+    def column(self, bit):
+        """
+        Returns the matrix column for a cell, adding one if needed.
+        """
+        column = self.columns.get(bit)
+        if column is None:
+            column = self.columns[bit] = len(self.bits)
+            self.bits.append(bit)
+            if column >= self.a.shape[1]:
+                self.a = np.hstack([self.a, np.zeros_like(self.a)])
+        return column
+
+    def add(self, mask, count):
+        """
+        Adds the constraint that `count` of the cells in `mask` are mines.
+        """
+        columns = []
+        while mask:
+            low = mask & -mask
+            columns.append(self.column(low.bit_length() - 1))
+            mask ^= low
+        row = np.zeros(self.a.shape[1])
+        row[columns] = 1
+        self.insert(row, count)
+
+    def insert(self, row, value):
+        """
+        Reduces a row against the current pivots and, if anything is left,
+        adds it as a new pivot row.
+        """
+        n = self.rows
+        a = self.a[:n]
+        b = self.b[:n]
+        if n:
+            factors = row[self.pivots]
+            row = row - factors @ a
+            value = value - factors @ b
+        row[np.abs(row) < EPSILON] = 0
+        if not row.any():
+            return
+
+        # Pivot on the largest coefficient and clear its column elsewhere
+        pivot = int(np.argmax(np.abs(row)))
+        value /= row[pivot]
+        row /= row[pivot]
+        touched = np.flatnonzero(a[:, pivot])
+        if len(touched):
+            factors = a[touched, pivot]
+            updated = a[touched] - np.outer(factors, row)
+            updated[np.abs(updated) < EPSILON] = 0
+            a[touched] = updated
+            b[touched] -= factors * value
+
+        if n == self.a.shape[0]:
+            self.a = np.vstack([self.a, np.zeros_like(self.a)])
+            self.b = np.concatenate([self.b, np.zeros_like(self.b)])
+        self.a[n] = row
+        self.b[n] = value
+        self.pivots.append(pivot)
+        self.rows += 1
+
+    def assign(self, mines, safes):
+        """
+        Substitutes known values for the cells in bitmasks `mines` and
+        `safes`, removing them from the system.
+        """
+        columns = []
+        values = []
+        for mask, value in [(mines, 1), (safes, 0)]:
+            while mask:
+                low = mask & -mask
+                column = self.columns.get(low.bit_length() - 1)
+                if column is not None:
+                    columns.append(column)
+                    values.append(value)
+                mask ^= low
+        if not columns:
+            return
+
+        n = self.rows
+        if n:
+            self.b[:n] -= self.a[:n, columns] @ np.array(values, dtype=float)
+            self.a[:n, columns] = 0
+
+        # Drop the assigned cells' columns, so that the matrix only spans
+        # cells that are still unknown
+        lost = set(columns)
+        live = [c for c in range(len(self.bits)) if c not in lost]
+        renumber = np.full(len(self.bits), -1)
+        renumber[live] = np.arange(len(live))
+        width = self.a.shape[1]
+        while width > 16 and 4 * len(live) <= width:
+            width //= 2
+        if width < self.a.shape[1]:
+            a = np.zeros((self.a.shape[0], width))
+            a[:n, :len(live)] = self.a[:n, live]
+            self.a = a
+        else:
+            self.a[:n, :len(live)] = self.a[:n, live]
+            self.a[:n, len(live):] = 0
+        self.bits = [self.bits[c] for c in live]
+        self.columns = {bit: c for c, bit in enumerate(self.bits)}
+
+        # Rows that lost their pivot have to be reduced again
+        keep = [i for i, p in enumerate(self.pivots) if p not in lost]
+        self.pivots = [int(renumber[p]) for p in self.pivots]
+        if len(keep) == n:
+            return
+        redo = [i for i, p in enumerate(self.pivots) if p < 0]
+        rows = [(self.a[i].copy(), self.b[i]) for i in redo]
+        self.a[:len(keep)] = self.a[keep]
+        self.b[:len(keep)] = self.b[keep]
+        self.a[len(keep):n] = 0
+        self.b[len(keep):n] = 0
+        self.pivots = [self.pivots[i] for i in keep]
+        self.rows = len(keep)
+        for row, value in rows:
+            self.insert(row, value)
+
+    def deduce(self):
+        """
+        Uses bounds on each row to find cells that must be mines or safe.
+        A row's left-hand side lies between the sum of its negative and the
+        sum of its positive coefficients; if the right-hand side equals one
+        of those bounds, every cell in the row is determined.
+        Returns a pair of bitmasks (mines, safes).
+        """
+        if not self.rows:
+            return 0, 0
+        a = self.a[:self.rows, :len(self.bits)]
+        b = self.b[:self.rows]
+        positive = a > 0
+        negative = a < 0
+        upper = np.where(positive, a, 0).sum(axis=1)
+        lower = np.where(negative, a, 0).sum(axis=1)
+        at_lower = np.abs(b - lower) < EPSILON
+        at_upper = np.abs(b - upper) < EPSILON
+        if not (at_lower.any() or at_upper.any()):
+            return 0, 0
+
+        mine_columns = (
+            (positive & at_upper[:, None]) | (negative & at_lower[:, None])
+        ).any(axis=0)
+        safe_columns = (
+            (positive & at_lower[:, None]) | (negative & at_upper[:, None])
+        ).any(axis=0)
+
+        mines = safes = 0
+        for column in np.flatnonzero(mine_columns):
+            mines |= 1 << self.bits[column]
+        for column in np.flatnonzero(safe_columns):
+            safes |= 1 << self.bits[column]
+        return mines, safes
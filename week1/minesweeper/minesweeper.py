@@ -1,6 +1,7 @@
 import itertools
 import random
-import copy
+
+from guess import mine_probabilities
 
 
 class Minesweeper():
@@ -85,35 +86,98 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+# Every cell a sentence has seen gets a bit position, so that sets of cells
+# can be stored as integer bitmasks; MinesweeperAI claims its board first,
+# so on a single board a cell's bit is its row-major index
+_cell_bits = {}
+_bit_cells = []
+
+
+def cell_bit(cell):
+    """
+    Returns the bit position used for `cell` in a cell bitmask.
+    """
+    bit = _cell_bits.get(cell)
+    if bit is None:
+        bit = _cell_bits[cell] = len(_bit_cells)
+        _bit_cells.append(cell)
+    return bit
+
+
+def to_mask(cells):
+    """
+    Returns the bitmask of a collection of cells.
+    """
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell_bit(cell)
+    return mask
+
+
+def to_cells(mask):
+    """
+    Returns the set of cells in a bitmask.
+    """
+    cells = set()
+    while mask:
+        low = mask & -mask
+        cells.add(_bit_cells[low.bit_length() - 1])
+        mask ^= low
+    return cells
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+    The cells are stored as a bitmask in `mask`; `cells` gives them as a
+    read-only frozenset, so change them with `mark_mine`, `mark_safe` or
+    by assigning to `cells`.
     """
 
+    __slots__ = ("mask", "count")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.mask = to_mask(cells)
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count):
+        """
+        Creates a sentence directly from a cell bitmask.
+        """
+        sentence = cls.__new__(cls)
+        sentence.mask = mask
+        sentence.count = count
+        return sentence
+
+    @property
+    def cells(self):
+        return frozenset(to_cells(self.mask))
+
+    @cells.setter
+    def cells(self, cells):
+        self.mask = to_mask(cells)
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.mask == other.mask and self.count == other.count
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{to_cells(self.mask)} = {self.count}"
 
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if self.count == len(self.cells): return self.cells
+        if self.count == self.mask.bit_count(): return to_cells(self.mask)
         else: return set()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        if self.count == 0: return self.cells
+        if self.count == 0: return to_cells(self.mask)
         else: return set()
 
     def mark_mine(self, cell):
@@ -121,18 +185,17 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
-            self.count -=1
-            
+        bit = 1 << cell_bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self.count -= 1
 
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        self.mask &= ~(1 << cell_bit(cell))
 
 
 class MinesweeperAI():
@@ -140,11 +203,12 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, solver="subset"):
 
-        # Set initial height and width
+        # Set initial height, width, and total number of mines
         self.height = height
         self.width = width
+        self.mine_count = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -153,27 +217,67 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # The same three sets as bitmasks, for fast inference
+        self.moves_mask = 0
+        self.mine_mask = 0
+        self.safe_mask = 0
+
+        # Bitmask of each cell's neighbours
+        self.neighbour_masks = {}
+        for i in range(height):
+            for j in range(width):
+                cell_bit((i, j))
+
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Enumerated frontier components, reused between guesses
+        self.guess_cache = {}
+
+        # Inference method: "subset" compares pairs of sentences,
+        # "linear" solves all sentences together as a linear system
+        if solver not in ("subset", "linear"):
+            raise ValueError(f"Unknown solver {solver!r}")
+        self.linear = None
+        if solver == "linear":
+            from linear import LinearSolver
+            self.linear = LinearSolver()
+            self.linear_known = 0
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.mark_masks(1 << cell_bit(cell), 0)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
+        self.mark_masks(0, 1 << cell_bit(cell))
+
+    def mark_masks(self, mines, safes):
+        """
+        Marks every cell in bitmask `mines` as a mine and every cell in
+        bitmask `safes` as safe, and updates all knowledge accordingly.
+        """
+        new_mines = mines & ~self.mine_mask
+        new_safes = safes & ~self.safe_mask
+        if new_mines:
+            self.mine_mask |= new_mines
+            self.mines |= to_cells(new_mines)
+        if new_safes:
+            self.safe_mask |= new_safes
+            self.safes |= to_cells(new_safes)
+
+        known = mines | safes
         for sentence in self.knowledge:
-            sentence.mark_safe(cell)
-    
+            if sentence.mask & known:
+                sentence.count -= (sentence.mask & mines).bit_count()
+                sentence.mask &= ~known
+
     def add_knowledge(self, cell, count):
         """
         Called when the Minesweeper board tells us, for a given
@@ -191,80 +295,118 @@ class MinesweeperAI():
         """
         #for 1
         self.moves_made.add(cell)
-        
+        self.moves_mask |= 1 << cell_bit(cell)
+
         #for 2
         self.mark_safe(cell)
-        
-        #for 3
-        cellsForKnowledge = set()
-        import copy
-        count = copy.deepcopy(count)
-        neighbouringCells = self.find_neighbours(cell)
-        for i in neighbouringCells:
-            if i in self.mines:
-                count-=1
-            if i not in self.mines and i not in self.safes:
-                cellsForKnowledge.add(i)
-        if len(cellsForKnowledge)>0:
-            self.knowledge.append(Sentence(cellsForKnowledge, count))
-        
-        #for 4
-        self.knowledge_checking()
 
-        #for 5
+        #for 3
+        neighbours = self.neighbour_mask(cell)
+        count -= (neighbours & self.mine_mask).bit_count()
+        cells = neighbours & ~(self.mine_mask | self.safe_mask)
+        if cells:
+            self.knowledge.append(Sentence.from_mask(cells, count))
+            # Sentences that settle every cell need no solving
+            if self.linear is not None and 0 < count < cells.bit_count():
+                self.linear.add(cells, count)
+
+        #for 4 and 5
         self.inference()
-        
+
+    def neighbour_mask(self, cell):
+        """
+        Returns the bitmask of the cells around `cell`.
+        """
+        mask = self.neighbour_masks.get(cell)
+        if mask is None:
+            mask = to_mask(self.find_neighbours(cell))
+            self.neighbour_masks[cell] = mask
+        return mask
 
     def find_neighbours(self, cell):
         adjacent = set()
-        for rows in range(self.height):
-            for columns in range(self.width):
-                if abs(cell[0] - rows) <= 1 and abs(cell[1] - columns) <= 1 and (rows, columns) != cell:
+        for rows in range(max(0, cell[0] - 1), min(self.height, cell[0] + 2)):
+            for columns in range(max(0, cell[1] - 1), min(self.width, cell[1] + 2)):
+                if (rows, columns) != cell:
                     adjacent.add((rows, columns))
         return adjacent
-    
+
     def knowledge_checking(self):
         """
         check knowledge for new safes and mines, updates knowledge if possible
+        Returns True if anything new was marked.
         """
-        # making a copy to mess around with
-        knowledge_copy = copy.deepcopy(self.knowledge)
-        # look through sentences
-        for sentence in knowledge_copy:
-            if len(sentence.cells) == 0 and len(knowledge_copy)!=0:
-                knowledge_copy.remove(sentence)
-            #get mines and safes
-            mines = sentence.known_mines()
-            safes = sentence.known_safes()
-            if mines:
-                for mine in mines:
-                    self.mark_mine(mine)
-                    self.knowledge_checking()
-            if safes:
-                for safe in safes:
-                    self.mark_safe(safe)
-                    self.knowledge_checking()
+        changed = False
+        while True:
+            mines = safes = 0
+            for sentence in self.knowledge:
+                if sentence.count == 0:
+                    safes |= sentence.mask
+                elif sentence.count == sentence.mask.bit_count():
+                    mines |= sentence.mask
+            if not mines and not safes:
+                break
+            self.mark_masks(mines, safes)
+            self.knowledge = [s for s in self.knowledge if s.mask]
+            changed = True
+        return changed
 
     def inference(self):
         """
-        Infer new conclusions from knowledge using subset method
-        """
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                # check if sentence 1 is subset of sentence 2
-                if sentence1.cells.issubset(sentence2.cells):
-                    cells_diff = sentence2.cells - sentence1.cells
-                    count_diff = sentence2.count - sentence1.count
-                    new_sentence = Sentence(cells_diff, count_diff)
-                    mines = new_sentence.known_mines()
-                    safes = new_sentence.known_safes()
-                    if mines:
-                        for mine in mines:
-                            self.mark_mine(mine)
-                    if safes:
-                        for safe in safes:
-                            self.mark_safe(safe)
-    
+        Infer new conclusions from knowledge using subset method,
+        until no more can be inferred
+        """
+        if self.linear is not None:
+            return self.linear_inference()
+
+        self.knowledge_checking()
+        while True:
+            known = set()
+            knowledge = []
+            for sentence in self.knowledge:
+                if (sentence.mask, sentence.count) not in known:
+                    known.add((sentence.mask, sentence.count))
+                    knowledge.append(sentence)
+            self.knowledge = knowledge
+
+            new = []
+            for sentence1 in knowledge:
+                for sentence2 in knowledge:
+                    # check if sentence 1 is a proper subset of sentence 2
+                    if (sentence1.mask & ~sentence2.mask == 0
+                            and sentence1.mask != sentence2.mask):
+                        mask = sentence2.mask & ~sentence1.mask
+                        count = sentence2.count - sentence1.count
+                        if (mask, count) not in known:
+                            known.add((mask, count))
+                            new.append(Sentence.from_mask(mask, count))
+            if not new:
+                break
+            self.knowledge.extend(new)
+            self.knowledge_checking()
+
+    def linear_inference(self):
+        """
+        Infer new conclusions from knowledge by solving all sentences
+        together as a linear system, until no more can be inferred.
+        Solving is put off while a known safe move is still waiting to be
+        made, since its result will add more knowledge first.
+        """
+        while True:
+            self.knowledge_checking()
+            known = self.mine_mask | self.safe_mask
+            self.linear.assign(
+                self.mine_mask & ~self.linear_known,
+                self.safe_mask & ~self.linear_known
+            )
+            self.linear_known = known
+            if self.safe_mask & ~self.moves_mask:
+                break
+            mines, safes = self.linear.deduce()
+            if not (mines | safes) & ~known:
+                break
+            self.mark_masks(mines, safes)
+
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -274,21 +416,45 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for i in self.safes-self.moves_made:
-            return i
-        return None
+        moves = self.safe_mask & ~self.moves_mask
+        if not moves:
+            return None
+        return _bit_cells[(moves & -moves).bit_length() - 1]
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Picks the cell least likely to be a mine given the knowledge base,
+        breaking ties randomly. Returns None if no such cell may be safe.
         """
-        move_chosen = False
-        while not move_chosen:
-            cellpos = (random.randint(0, self.height-1), random.randint(0, self.width-1))
-            if cellpos not in self.mines and cellpos not in self.moves_made:
-                move_chosen = True
-                return cellpos
-        return None
+        unknown = set(
+            (i, j) for i in range(self.height) for j in range(self.width)
+        ) - self.moves_made - self.mines
+        if not unknown:
+            return None
+        safes = unknown & self.safes
+        if safes:
+            return random.choice(sorted(safes))
+
+        constraints = []
+        frontier = set()
+        for sentence in self.knowledge:
+            cells = sentence.cells & unknown
+            if cells:
+                count = sentence.count - len(sentence.cells & self.mines)
+                constraints.append((cells, count))
+                frontier |= cells
+
+        probabilities = mine_probabilities(
+            constraints, unknown - frontier,
+            self.mine_count - len(self.mines), self.guess_cache
+        )
+        lowest = min(probabilities.values())
+        if lowest >= 1:
+            return None
+        return random.choice(sorted(
+            cell for cell, p in probabilities.items() if p - lowest < 1e-9
+        ))
@@ -1,6 +1,7 @@
 import pygame
+import queue
 import sys
-import time
+import threading
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -8,6 +9,14 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Optionally take board size from the command line
+if len(sys.argv) == 4:
+    HEIGHT, WIDTH, MINES = (int(arg) for arg in sys.argv[1:])
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [height width mines]")
+
+FPS = 60
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -17,6 +26,7 @@ WHITE = (255, 255, 255)
 pygame.init()
 size = width, height = 600, 400
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 # Fonts
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
@@ -30,6 +40,7 @@ board_width = ((2 / 3) * width) - (BOARD_PADDING * 2)
 board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
+border = max(1, min(3, cell_size // 10))
 
 # Add images
 flag = pygame.image.load("assets/images/flag.png")
@@ -37,29 +48,186 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Render each cell's possible number once
+numberFont = pygame.font.Font(
+    OPEN_SANS, min(20, max(6, int(cell_size * 0.6)))
+)
+numbers = [numberFont.render(str(n), True, BLACK) for n in range(9)]
+
+# Buttons and their labels
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+statusRect = pygame.Rect(
+    (2 / 3) * width, (2 / 3) * height - 25, width / 3, 50
+)
+labels = {
+    "ai": mediumFont.render("AI Move", True, BLACK),
+    "thinking": mediumFont.render("Thinking", True, BLACK),
+    "reset": mediumFont.render("Reset", True, BLACK),
+    "Lost": mediumFont.render("Lost", True, WHITE),
+    "Won": mediumFont.render("Won", True, WHITE),
+    "": mediumFont.render("", True, WHITE),
+}
+
+
+def cell_rect(cell):
+    """
+    Return the screen rectangle of a board cell.
+    """
+    i, j = cell
+    return pygame.Rect(
+        board_origin[0] + j * cell_size,
+        board_origin[1] + i * cell_size,
+        cell_size, cell_size
+    )
+
+
+def cell_at(position):
+    """
+    Return the board cell under a screen position, or None.
+    """
+    i = (position[1] - board_origin[1]) // cell_size
+    j = (position[0] - board_origin[0]) // cell_size
+    if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+        return (i, j)
+    return None
+
+
+def draw_cell(cell):
+    """
+    Draw one board cell and return its rectangle.
+    """
+    rect = cell_rect(cell)
+    pygame.draw.rect(screen, GRAY, rect)
+    pygame.draw.rect(screen, WHITE, rect, border)
+
+    # Add a mine, flag, or number if needed
+    if game.is_mine(cell) and lost:
+        screen.blit(mine, rect)
+    elif cell in flags:
+        screen.blit(flag, rect)
+    elif cell in revealed:
+        neighbors = numbers[game.nearby_mines(cell)]
+        neighborsTextRect = neighbors.get_rect()
+        neighborsTextRect.center = rect.center
+        screen.blit(neighbors, neighborsTextRect)
+    return rect
+
+
+def draw_button(rect, label):
+    """
+    Draw a button with a cached label and return its rectangle.
+    """
+    pygame.draw.rect(screen, WHITE, rect)
+    labelRect = label.get_rect()
+    labelRect.center = rect.center
+    screen.blit(label, labelRect)
+    return rect
+
+
+def draw_status(text):
+    """
+    Draw the game status text and return its rectangle.
+    """
+    pygame.draw.rect(screen, BLACK, statusRect)
+    label = labels[text]
+    labelRect = label.get_rect()
+    labelRect.center = ((5 / 6) * width, (2 / 3) * height)
+    screen.blit(label, labelRect)
+    return statusRect
+
+
+def ai_worker(requests, results):
+    """
+    Run the AI off the render thread.
+
+    Requests are tuples tagged with the game they belong to:
+        ("reset", game_id): start a new AI
+        ("knowledge", game_id, cell, count): call add_knowledge
+        ("move", game_id): choose a move
+    Each move request is answered on `results` with
+    (game_id, move, kind, mines), where `kind` says how it was chosen.
+    """
+    ai = None
+    current = None
+    while True:
+        request = requests.get()
+        kind, game_id = request[0], request[1]
+        if kind == "reset":
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+            current = game_id
+        elif game_id != current:
+            continue
+        elif kind == "knowledge":
+            ai.add_knowledge(request[2], request[3])
+        elif kind == "move":
+            move = ai.make_safe_move()
+            if move is not None:
+                results.put((game_id, move, "safe", None))
+                continue
+            move = ai.make_random_move()
+            if move is None:
+                results.put((game_id, None, "none", ai.mines.copy()))
+            else:
+                results.put((game_id, move, "random", None))
+
+
+# Start the AI worker
+requests = queue.Queue()
+results = queue.Queue()
+threading.Thread(
+    target=ai_worker, args=(requests, results), daemon=True
+).start()
+
+
+def new_game(game_id):
+    """
+    Create a new game and tell the AI worker about it.
+    """
+    requests.put(("reset", game_id))
+    return Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+
+
 # Create game and AI agent
-game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+game_id = 0
+game = new_game(game_id)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
+thinking = False
 
 # Show instructions initially
 instructions = True
 
+# Redraw everything on the first board frame
+redraw = True
+dirty = set()
+status = None
+drawn_thinking = None
+
 while True:
 
-    # Check if game quit
+    clock.tick(FPS)
+    clicks = []
+
+    # Check if game quit, and collect mouse clicks
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
-
-    screen.fill(BLACK)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+            clicks.append(event)
 
     # Show game instructions
     if instructions:
+        screen.fill(BLACK)
 
         # Title
         title = largeFont.render("Play Minesweeper", True, WHITE)
@@ -88,135 +256,103 @@ while True:
         screen.blit(buttonText, buttonTextRect)
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
+        for click in clicks:
+            if click.button == 1 and buttonRect.collidepoint(click.pos):
                 instructions = False
-                time.sleep(0.3)
+                redraw = True
 
         pygame.display.flip()
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
     move = None
 
-    left, _, right = pygame.mouse.get_pressed()
-
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
-
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
+    # Check for an AI move computed by the worker
+    while True:
+        try:
+            result_id, ai_move, kind, ai_mines = results.get_nowait()
+        except queue.Empty:
+            break
+        if result_id != game_id:
+            continue
+        thinking = False
+        if kind == "none":
+            dirty |= flags ^ ai_mines
+            flags = ai_mines
+            print("No moves left to make.")
+        elif not lost:
+            move = ai_move
+            if kind == "random":
+                print("No known safe moves, AI making random move.")
             else:
                 print("AI making safe move.")
-            time.sleep(0.2)
+
+    for click in clicks:
+        cell = cell_at(click.pos)
+
+        # Check for a right-click to toggle flagging
+        if click.button == 3:
+            if not lost and cell is not None and cell not in revealed:
+                if cell in flags:
+                    flags.remove(cell)
+                else:
+                    flags.add(cell)
+                dirty.add(cell)
+
+        # If AI button clicked, ask the worker for an AI move
+        elif aiButton.collidepoint(click.pos):
+            if not lost and not thinking:
+                requests.put(("move", game_id))
+                thinking = True
 
         # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+        elif resetButton.collidepoint(click.pos):
+            game_id += 1
+            game = new_game(game_id)
             revealed = set()
             flags = set()
             lost = False
-            continue
+            thinking = False
+            redraw = True
+            move = None
 
         # User-made move
-        elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
+        elif not lost and not thinking and cell is not None:
+            if cell not in flags and cell not in revealed:
+                move = cell
 
     # Make move and update AI knowledge
     if move:
         if game.is_mine(move):
             lost = True
+            dirty |= game.mines
         else:
             nearby = game.nearby_mines(move)
             revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            dirty.add(move)
+            requests.put(("knowledge", game_id, move, nearby))
+
+    # Draw only what changed since the last frame
+    updated = []
+    if redraw:
+        screen.fill(BLACK)
+        dirty = set((i, j) for i in range(HEIGHT) for j in range(WIDTH))
+        status = None
+        updated.append(screen.get_rect())
+    for cell in dirty:
+        updated.append(draw_cell(cell))
+    if redraw or thinking != drawn_thinking:
+        label = labels["thinking" if thinking else "ai"]
+        updated.append(draw_button(aiButton, label))
+        updated.append(draw_button(resetButton, labels["reset"]))
+        drawn_thinking = thinking
 
-    pygame.display.flip()
+    # Display text
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if text != status:
+        updated.append(draw_status(text))
+        status = text
+
+    redraw = False
+    dirty = set()
+    if updated:
+        pygame.display.update(updated)
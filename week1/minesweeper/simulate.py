@@ -0,0 +1,143 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play_game(ai_class, height, width, mines, seed, solver="subset"):
+    """
+    Play one headless game between `ai_class` and a board seeded by `seed`,
+    with the AI using inference method `solver`.
+
+    Return a dictionary with:
+        - `won`: whether every safe cell was revealed
+        - `moves`: number of cells revealed (including a fatal one)
+        - `guesses`: number of moves that were not known to be safe
+        - `latencies`: seconds spent choosing and learning from each move
+        - `guess_seconds`: seconds spent in make_random_move
+        - `knowledge`: size of the knowledge base after each move
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = ai_class(
+        height=height, width=width, mines=mines, solver=solver
+    )
+    stats = {
+        "won": False,
+        "moves": 0,
+        "guesses": 0,
+        "latencies": [],
+        "guess_seconds": 0,
+        "knowledge": [],
+    }
+
+    while len(ai.moves_made) < height * width - mines:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            guess_start = time.perf_counter()
+            move = ai.make_random_move()
+            stats["guess_seconds"] += time.perf_counter() - guess_start
+            stats["guesses"] += 1
+            if move is None:
+                # No cell left to try, with safe cells still hidden
+                return stats
+        stats["moves"] += 1
+        if game.is_mine(move):
+            stats["latencies"].append(time.perf_counter() - start)
+            return stats
+        ai.add_knowledge(move, game.nearby_mines(move))
+        stats["latencies"].append(time.perf_counter() - start)
+        stats["knowledge"].append(len(ai.knowledge))
+
+    stats["won"] = True
+    return stats
+
+
+def percentile(values, q):
+    """
+    Return the `q`th percentile (0-100) of a sorted list of values,
+    using the nearest-rank method.
+    """
+    if not values:
+        return 0
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def simulate(games, height, width, mines, seed=0, processes=None,
+             ai_class=MinesweeperAI, solver="subset"):
+    """
+    Play `games` seeded games across a pool of `processes` workers.
+    Return the list of per-game statistics, in seed order.
+    """
+    jobs = [
+        (ai_class, height, width, mines, seed + i, solver)
+        for i in range(games)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.starmap(play_game, jobs)
+
+
+def report(results):
+    """
+    Summarise per-game statistics from `simulate` into a dictionary.
+    """
+    latencies = sorted(t for r in results for t in r["latencies"])
+    knowledge = [k for r in results for k in r["knowledge"]]
+    games = len(results)
+    return {
+        "games": games,
+        "win_rate": sum(r["won"] for r in results) / games,
+        "moves_per_game": sum(r["moves"] for r in results) / games,
+        "guesses_per_game": sum(r["guesses"] for r in results) / games,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": latencies[-1] if latencies else 0,
+        "knowledge_mean": sum(knowledge) / len(knowledge) if knowledge else 0,
+        "knowledge_max": max(knowledge, default=0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play seeded Minesweeper games with MinesweeperAI."
+    )
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--density", type=float, default=0.125,
+                        help="fraction of cells that are mines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("--solver", choices=["subset", "linear"],
+                        default="subset")
+    args = parser.parse_args()
+
+    mines = round(args.height * args.width * args.density)
+    start = time.perf_counter()
+    results = simulate(
+        args.games, args.height, args.width, mines,
+        seed=args.seed, processes=args.processes, solver=args.solver
+    )
+    elapsed = time.perf_counter() - start
+    summary = report(results)
+
+    print(f"{args.height}x{args.width}, {mines} mines, "
+          f"{args.games} games in {elapsed:.1f}s ({args.solver} solver)")
+    print(f"  Win rate: {summary['win_rate']:.1%}")
+    print(f"  Moves per game: {summary['moves_per_game']:.1f}")
+    print(f"  Guesses per game: {summary['guesses_per_game']:.2f}")
+    print("  Move latency:")
+    for field in ["p50", "p90", "p99", "max"]:
+        print(f"    {field}: {summary['latency_' + field] * 1000:.3f} ms")
+    print("  Knowledge base size:")
+    print(f"    mean: {summary['knowledge_mean']:.1f}")
+    print(f"    max: {summary['knowledge_max']}")
+
+
+if __name__ == "__main__":
+    main()
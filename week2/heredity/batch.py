@@ -0,0 +1,169 @@
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from factors import GENES, TRAITS, Pedigree, Plan, structure
+from heredity import load_data
+
+# Number of files handed to a worker at a time
+CHUNK_SIZE = 16
+
+# Compiled plans kept by each worker
+CACHE_SIZE = 256
+
+COLUMNS = (
+    ["path", "name"]
+    + [f"gene_{genes}" for genes in GENES]
+    + [f"trait_{str(trait).lower()}" for trait in TRAITS]
+)
+
+# Compiled plans of the worker process, keyed by family structure
+_plans = {}
+
+
+def find_files(pattern):
+    """
+    Return the sorted paths of the pedigree CSVs in a directory, or
+    matching a glob pattern.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.csv")
+    return sorted(glob.glob(pattern))
+
+
+def plan_for(people):
+    """
+    Return the compiled plan for a family's structure, compiling it on
+    first use and keeping at most CACHE_SIZE plans.
+    """
+    shape = structure(people)
+    plan = _plans.pop(shape, None)
+    if plan is None:
+        plan = Plan(shape)
+        if _plans and len(_plans) >= CACHE_SIZE:
+            del _plans[next(iter(_plans))]
+    _plans[shape] = plan
+    return plan
+
+
+def _infer(path):
+    """
+    Compute the distributions of every person in one pedigree file.
+    Return a tuple (path, rows, error), with one output row per person,
+    or the error message if the file could not be processed.
+    """
+    try:
+        people = load_data(path)
+        if not people:
+            raise ValueError("no people in file")
+        probabilities = Pedigree(people, plan_for(people)).probabilities()
+    except (OSError, KeyError, ValueError) as e:
+        return path, [], f"{type(e).__name__}: {e}"
+    rows = []
+    for name in people:
+        genes = probabilities[name]["gene"]
+        traits = probabilities[name]["trait"]
+        rows.append(
+            [path, name]
+            + [genes[value] for value in GENES]
+            + [traits[value] for value in TRAITS]
+        )
+    return path, rows, None
+
+
+def run(paths, output, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    Compute every person's distributions for each pedigree file in
+    `paths` across a pool of processes, and write them to `output` with
+    one entry per person in file order.
+
+    The output is columnar: a NumPy .npz archive holding one array per
+    entry of COLUMNS, unless `output` ends in ".csv", in which case it
+    is a CSV file with a row per person.
+
+    Return a dictionary with the number of files, people and failures,
+    the time taken, and the failed files' error messages.
+    """
+    start = time.perf_counter()
+    columns = {column: [] for column in COLUMNS}
+    failures = {}
+    with multiprocessing.Pool(processes) as pool:
+        for path, rows, error in pool.imap(_infer, paths, chunk_size):
+            if error is not None:
+                failures[path] = error
+                continue
+            for row in rows:
+                for column, value in zip(COLUMNS, row):
+                    columns[column].append(value)
+
+    if output.lower().endswith(".csv"):
+        write_csv(output, columns)
+    else:
+        write_columns(output, columns)
+
+    seconds = time.perf_counter() - start
+    return {
+        "files": len(paths),
+        "people": len(columns["name"]),
+        "failed": len(failures),
+        "seconds": seconds,
+        "files_per_second": len(paths) / seconds if seconds else 0,
+        "errors": failures,
+    }
+
+
+def write_columns(output, columns):
+    """
+    Write columns of results to `output` as a compressed .npz archive
+    with an array per column: strings for the path and name columns,
+    and floats for the probabilities.
+    """
+    arrays = {}
+    for column, values in columns.items():
+        text = column in ("path", "name")
+        arrays[column] = np.array(values, dtype=str if text else float)
+    with open(output, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+def write_csv(output, columns):
+    """
+    Write columns of results to `output` as a CSV file with a header
+    row and a row per person.
+    """
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(zip(*(columns[column] for column in COLUMNS)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute heredity probabilities for many families."
+    )
+    parser.add_argument("input", help="directory or glob of family CSVs")
+    parser.add_argument("output",
+                        help=".npz archive to write, or a .csv file")
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    paths = find_files(args.input)
+    if not paths:
+        sys.exit(f"No pedigree files found for {args.input}")
+    stats = run(paths, args.output, args.processes)
+    for path, error in stats["errors"].items():
+        print(f"{path}: {error}", file=sys.stderr)
+    print(f"Processed {stats['files']} files, {stats['people']} people "
+          f"in {stats['seconds']:.2f}s "
+          f"({stats['files_per_second']:.0f} files/s), "
+          f"{stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import random
+import sys
+import time
+
+from factors import Pedigree
+from heredity import enumerate_probabilities, load_data
+from vectorized import Family
+
+FAMILIES = ["data/family0.csv", "data/family1.csv", "data/family2.csv"]
+
+# Sizes of generated families, all small enough for enumeration
+SIZES = [6, 7, 8]
+
+METHODS = [
+    ("enumeration", enumerate_probabilities),
+    ("vectorized", lambda people: Family(people).probabilities()),
+    ("variable elimination",
+     lambda people: Pedigree(people).probabilities()),
+]
+
+
+def generate_family(n, seed=0, known=0.5):
+    """
+    Return a random family of `n` people in the format of `load_data`.
+    Each child's parents are an earlier couple; children sometimes marry
+    a newcomer and start a couple of their own. Each trait is known
+    with probability `known`.
+    """
+    rng = random.Random(seed)
+    people = {}
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        trait = rng.choice([True, False]) if rng.random() < known else None
+        people[name] = {
+            "name": name, "mother": mother, "father": father, "trait": trait
+        }
+        return name
+
+    couples = [(add(), add())]
+    while len(people) < n:
+        child = add(*rng.choice(couples))
+        if rng.random() < 0.5 and len(people) < n:
+            spouse = add()
+            couples.append(
+                (child, spouse) if rng.random() < 0.5 else (spouse, child)
+            )
+    return people
+
+
+def timed(method, people, seconds=0.5):
+    """
+    Run `method` on `people` repeatedly for about `seconds`.
+    Return the result and the mean time per run.
+    """
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        result = method(people)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return result, elapsed / runs
+
+
+def difference(a, b):
+    """
+    Largest difference between two sets of distributions.
+    """
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a
+        for field in a[person]
+        for value in a[person][field]
+    )
+
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    families = [(path, load_data(path)) for path in FAMILIES]
+    families += [
+        (f"generated, {n} people", generate_family(n, seed))
+        for n in SIZES
+    ]
+
+    for name, people in families:
+        print(name)
+        reference = None
+        for method_name, method in METHODS:
+            result, seconds = timed(method, people)
+            if reference is None:
+                reference, baseline = result, seconds
+            print(f"  {method_name}: {seconds * 1000:.3f} ms, "
+                  f"{baseline / seconds:.1f}x, "
+                  f"max difference {difference(result, reference):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import sys
+
+import numpy as np
+
+from heredity import PROBS, load_data, print_probabilities
+
+# Gene counts, in the order used to index factor tables
+GENES = [2, 1, 0]
+TRAITS = [True, False]
+
+# Largest number of variables in one intermediate factor (3 ** 15
+# entries) before giving up on exact inference
+MAX_WIDTH = 15
+
+
+def gene_prior():
+    """
+    Unconditional probability of each gene count, indexed like GENES.
+    """
+    return np.array([PROBS["gene"][genes] for genes in GENES])
+
+
+def trait_table():
+    """
+    Probability of each trait value given each gene count, as a matrix
+    indexed by (gene count, trait) like GENES and TRAITS.
+    """
+    return np.array([
+        [PROBS["trait"][genes][trait] for trait in TRAITS]
+        for genes in GENES
+    ])
+
+
+def inheritance_table():
+    """
+    Probability of a child's gene count given its parents', as an array
+    indexed by (mother's genes, father's genes, child's genes).
+
+    A parent with two copies passes the gene on unless it mutates, one
+    with one copy passes it on half the time, and one with none passes
+    it on only by mutation.
+    """
+    mutation = PROBS["mutation"]
+    passes = {2: 1 - mutation, 1: 0.5, 0: mutation}
+    p = np.array([passes[genes] for genes in GENES])
+    mother = p[:, None]
+    father = p[None, :]
+    table = np.empty((3, 3, 3))
+    table[:, :, GENES.index(2)] = mother * father
+    table[:, :, GENES.index(1)] = (
+        mother * (1 - father) + (1 - mother) * father
+    )
+    table[:, :, GENES.index(0)] = (1 - mother) * (1 - father)
+    return table
+
+
+def structure(people):
+    """
+    Return the shape of a family, as returned by `load_data`: for each
+    person in order, the positions of their mother and father, or None.
+    """
+    index = {name: i for i, name in enumerate(people)}
+    return tuple(
+        None if person["mother"] is None
+        else (index[person["mother"]], index[person["father"]])
+        for person in people.values()
+    )
+
+
+class Plan():
+    """
+    Variable elimination compiled for one family structure.
+
+    Each person has one factor: over their own gene count if they have
+    no parents, or over (mother's, father's, own) gene counts otherwise.
+    For each person, the plan lists the contractions that turn these
+    factors into that person's gene marginal. Families with the same
+    structure share a plan whatever their traits, since evidence only
+    changes the numbers in the factors.
+    """
+
+    def __init__(self, shape):
+        self.n = len(shape)
+        self.scopes = [
+            (i,) if parents is None else (*parents, i)
+            for i, parents in enumerate(shape)
+        ]
+        self.order, self.width = self.elimination_order()
+        if self.width > MAX_WIDTH:
+            raise ValueError(
+                f"Pedigree needs factors over {self.width} people, "
+                "too many for exact inference"
+            )
+        self.steps = [self.compile(query) for query in range(self.n)]
+
+    def elimination_order(self):
+        """
+        Return a pair (order, width): an order in which to eliminate the
+        gene variables and the most variables in any factor it creates.
+
+        The order is chosen greedily: each time, the variable with the
+        fewest neighbours in the graph of variables sharing a factor, so
+        that eliminating it creates the smallest factor.
+        """
+        neighbours = {i: set() for i in range(self.n)}
+        for scope in self.scopes:
+            for variable in scope:
+                neighbours[variable].update(scope)
+                neighbours[variable].discard(variable)
+
+        order = []
+        width = 0
+        while neighbours:
+            variable = min(
+                neighbours, key=lambda v: (len(neighbours[v]), v)
+            )
+            adjacent = neighbours.pop(variable)
+            for other in adjacent:
+                neighbours[other].update(adjacent - {other})
+                neighbours[other].discard(variable)
+            order.append(variable)
+            width = max(width, len(adjacent) + 1)
+        return order, width
+
+    def compile(self, query):
+        """
+        Return the contractions that compute the gene marginal of person
+        `query`, as a list of einsum argument lists. Each step's operands
+        are named by slot: slots 0..n-1 hold the factors and each step
+        writes its result to the next free slot.
+        """
+        factors = list(enumerate(self.scopes))
+        slot = self.n
+        steps = []
+        eliminate = [v for v in self.order if v != query] + [None]
+        for variable in eliminate:
+            if variable is None:
+                bucket, factors = factors, []
+                kept = (query,)
+            else:
+                bucket = [f for f in factors if variable in f[1]]
+                factors = [f for f in factors if variable not in f[1]]
+                scope = set().union(*(variables for _, variables in bucket))
+                kept = tuple(sorted(scope - {variable}))
+
+            variables = sorted(
+                set().union(*(variables for _, variables in bucket))
+            )
+            axis = {v: i for i, v in enumerate(variables)}
+            operands = [
+                (index, [axis[v] for v in variables])
+                for index, variables in bucket
+            ]
+            steps.append((operands, [axis[v] for v in kept]))
+            factors.append((slot, kept))
+            slot += 1
+        return steps
+
+    def marginal(self, tables, query):
+        """
+        Return the gene marginal of person `query`, indexed like GENES,
+        given the factor tables of a family with this structure.
+
+        Each intermediate result is rescaled so its largest entry is 1,
+        which keeps long products of small probabilities from
+        underflowing; only relative values matter.
+        """
+        values = list(tables)
+        for operands, output in self.steps[query]:
+            arguments = []
+            for index, axes in operands:
+                arguments.append(values[index])
+                arguments.append(axes)
+            table = np.einsum(*arguments, output)
+            largest = table.max()
+            if largest > 0:
+                table = table / largest
+            values.append(table)
+        marginal = values[-1]
+        return marginal / marginal.sum()
+
+
+class Pedigree():
+    """
+    A family, as returned by `load_data`, as a factor graph over each
+    person's gene count.
+
+    Each person contributes one factor: the unconditional gene
+    distribution for people without parents, or the inheritance table
+    over both parents' genes and their own otherwise. A known trait is
+    evidence about a person's genes alone, so it is folded into their
+    factor as the likelihood of the observed trait given each gene
+    count. An unknown trait sums to one and drops out.
+
+    Marginals are computed by variable elimination, following `plan`
+    if given (it must be compiled for this family's structure).
+    """
+
+    def __init__(self, people, plan=None):
+        self.people = people
+        self.names = list(people)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.traits = trait_table()
+        self.plan = plan if plan is not None else Plan(structure(people))
+
+        prior = gene_prior()
+        inheritance = inheritance_table()
+        self.tables = []
+        for name in self.names:
+            person = people[name]
+            table = prior if person["mother"] is None else inheritance
+            if person["trait"] is not None:
+                likelihood = self.traits[:, TRAITS.index(person["trait"])]
+                table = table * likelihood
+            self.tables.append(table)
+
+    def gene_marginal(self, name):
+        """
+        Return the probability of each gene count of person `name`
+        given the evidence, indexed like GENES, by variable elimination.
+        """
+        return self.plan.marginal(self.tables, self.index[name])
+
+    def probabilities(self):
+        """
+        Return gene and trait distributions for everyone, in the same
+        format as `main` in heredity.py.
+        """
+        probabilities = {}
+        for name in self.names:
+            genes = self.gene_marginal(name)
+            trait = self.people[name]["trait"]
+            if trait is None:
+                traits = genes @ self.traits
+            else:
+                traits = np.array([float(t == trait) for t in TRAITS])
+            probabilities[name] = {
+                "gene": dict(zip(GENES, genes.tolist())),
+                "trait": dict(zip(TRAITS, traits.tolist())),
+            }
+        return probabilities
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python factors.py data.csv")
+    people = load_data(sys.argv[1])
+    print_probabilities(people, Pedigree(people).probabilities())
+
+
+if __name__ == "__main__":
+    main()
@@ -43,7 +43,17 @@ def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python heredity.py data.csv")
     people = load_data(sys.argv[1])
+    probabilities = enumerate_probabilities(people)
 
+    # Print results
+    print_probabilities(people, probabilities)
+
+
+def enumerate_probabilities(people):
+    """
+    Return every person's gene and trait distributions, by summing the
+    probability of every gene assignment together with the evidence.
+    """
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {
@@ -60,31 +70,25 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
+    # Traits are known or depend only on their owner's genes, so only
+    # gene assignments are enumerated; unknown traits are summed over
+    # analytically in update_genes
     names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+            p = evidence_probability(people, one_gene, two_genes)
+            update_genes(probabilities, people, one_gene, two_genes, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
 
-    # Print results
+    return probabilities
+
+
+def print_probabilities(people, probabilities):
+    """
+    Print each person's gene and trait distributions.
+    """
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
@@ -118,14 +122,13 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Yield every subset of set s, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for subset in itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    ):
+        yield set(subset)
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -139,6 +142,20 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait. 
     """
+    probability = gene_probability(people, one_gene, two_genes)
+    for person in people:
+        genes = (1 if person in one_gene else
+                 2 if person in two_genes else 0)
+        probability *= PROBS["trait"][genes][person in have_trait]
+    return probability
+
+
+def gene_probability(people, one_gene, two_genes):
+    """
+    Return the probability that everyone in `one_gene` has one copy of
+    the gene, everyone in `two_genes` has two and everyone else has none,
+    leaving traits aside.
+    """
     #set initial probability to 1
     probability = 1
 
@@ -152,21 +169,13 @@ def joint_probability(people, one_gene, two_genes, have_trait):
             genenumber = 2
         else:
             genenumber = 0
-        
-        #setting presence or absence of the trait in `trait`
-        trait = None
-        if person in have_trait:
-            trait = True
-        else:
-            trait = False
-        
+
         #get probability of given genenumber
         geneprob = PROBS["gene"][genenumber]
-        traitprob = PROBS['trait'][trait]
 
         #checking for parents
         if people[person]["father"] == None:
-            probability = probability * geneprob * traitprob
+            probability = probability * geneprob
         else:
             #parents exist
             mother = people[person]["mother"]
@@ -199,12 +208,41 @@ def joint_probability(people, one_gene, two_genes, have_trait):
                 probability = probability * ((1-probinherit[mother])*probinherit[father] + (1-probinherit[father])*probinherit[mother])
             else:
                 probability = probability * probinherit[mother] * probinherit[father]
-            
-            probability *= traitprob
     return probability
-        
-            
-        
+
+
+def evidence_probability(people, one_gene, two_genes):
+    """
+    Return the probability that everyone has the genes given by
+    `one_gene` and `two_genes` and every known trait is as observed.
+    """
+    probability = gene_probability(people, one_gene, two_genes)
+    for person in people:
+        if people[person]["trait"] is not None:
+            genes = (1 if person in one_gene else
+                     2 if person in two_genes else 0)
+            probability *= PROBS["trait"][genes][people[person]["trait"]]
+    return probability
+
+
+def update_genes(probabilities, people, one_gene, two_genes, p):
+    """
+    Add to `probabilities` the probability `p` of a gene assignment
+    together with the evidence. Known traits get all of `p`; unknown
+    traits share it according to the person's genes.
+    """
+    for person in probabilities:
+        genes = (1 if person in one_gene else
+                 2 if person in two_genes else 0)
+        probabilities[person]["gene"][genes] += p
+        trait = people[person]["trait"]
+        if trait is not None:
+            probabilities[person]["trait"][trait] += p
+        else:
+            for value in (True, False):
+                probabilities[person]["trait"][value] += (
+                    p * PROBS["trait"][genes][value]
+                )
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
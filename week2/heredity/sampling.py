@@ -0,0 +1,364 @@
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from factors import GENES, TRAITS, gene_prior, inheritance_table, trait_table
+from heredity import load_data
+
+METHODS = ["likelihood", "gibbs"]
+
+# Default wall-clock budget, in seconds
+BUDGET = 2.0
+
+# Samples drawn at once by likelihood weighting, and chains advanced
+# together by Gibbs sampling, in each process
+BATCH_SIZE = 1024
+
+# Effective sample size below which estimates are flagged as unreliable
+MIN_EFFECTIVE_SAMPLES = 100
+
+# Gibbs sweeps to discard at the start of each chain
+BURN_IN = 50
+
+# Groups of Gibbs chains in each process whose totals are kept apart;
+# chains are independent, so the spread between groups gives honest
+# standard errors despite correlation along each chain
+GROUPS = 32
+
+
+class Sampler():
+    """
+    A family, as returned by `load_data`, prepared for sampling gene
+    assignments.
+
+    Gene counts are indices into GENES. Known traits enter as evidence:
+    `likelihood[i, g]` is the probability of person i's observed trait
+    given gene count g, or 1 if the trait is unknown. Unknown traits are
+    never sampled; their distribution follows exactly from the genes.
+    """
+
+    def __init__(self, people):
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        self.n = n
+
+        self.prior = gene_prior()
+        self.inheritance = inheritance_table()
+        self.log_inheritance = np.log(self.inheritance)
+        traits = trait_table()
+
+        self.mothers = np.full(n, -1)
+        self.fathers = np.full(n, -1)
+        for name in self.names:
+            if people[name]["mother"] is not None:
+                self.mothers[index[name]] = index[people[name]["mother"]]
+                self.fathers[index[name]] = index[people[name]["father"]]
+
+        # Per-person trait distribution given each gene count
+        self.trait_given_genes = np.empty((n, 3, 2))
+        self.likelihood = np.ones((n, 3))
+        for i, name in enumerate(self.names):
+            trait = people[name]["trait"]
+            if trait is None:
+                self.trait_given_genes[i] = traits
+            else:
+                column = TRAITS.index(trait)
+                self.likelihood[i] = traits[:, column]
+                self.trait_given_genes[i] = 0
+                self.trait_given_genes[i, :, column] = 1
+        self.log_likelihood = np.log(self.likelihood)
+
+        # For each person, (child, other parent, is mother) triples
+        self.children = [[] for _ in range(n)]
+        for child in range(n):
+            mother, father = self.mothers[child], self.fathers[child]
+            if mother >= 0:
+                self.children[mother].append((child, father, True))
+                self.children[father].append((child, mother, False))
+
+        self.order = self.topological_order()
+
+    def topological_order(self):
+        """
+        Return the people in an order that puts parents before children.
+        """
+        order = []
+        placed = set()
+
+        def place(i):
+            if i in placed:
+                return
+            placed.add(i)
+            if self.mothers[i] >= 0:
+                place(self.mothers[i])
+                place(self.fathers[i])
+            order.append(i)
+
+        for i in range(self.n):
+            place(i)
+        return order
+
+    def forward(self, rng, size):
+        """
+        Sample `size` gene assignments from the prior and inheritance
+        model alone. Return an array with one row per sample and the log
+        likelihood of the evidence for each.
+        """
+        genes = np.empty((size, self.n), dtype=np.int64)
+        log_weight = np.zeros(size)
+        for i in self.order:
+            if self.mothers[i] < 0:
+                probs = np.broadcast_to(self.prior, (size, 3))
+            else:
+                probs = self.inheritance[
+                    genes[:, self.mothers[i]], genes[:, self.fathers[i]]
+                ]
+            genes[:, i] = choose(rng, probs)
+            log_weight += self.log_likelihood[i, genes[:, i]]
+        return genes, log_weight
+
+    def likelihood_weighting(self, rng, deadline, size=BATCH_SIZE):
+        """
+        Draw batches of likelihood-weighted samples until `deadline`.
+        Yield a tuple (log scale, samples, total weight, total squared
+        weight, gene totals) per batch, where weights are relative to
+        exp(log scale) and gene totals hold each person's weight per
+        gene count.
+        """
+        cells = 3 * np.arange(self.n)
+        while time.time() < deadline:
+            genes, log_weight = self.forward(rng, size)
+            scale = log_weight.max()
+            weight = np.exp(log_weight - scale)
+            totals = np.bincount(
+                (cells + genes).ravel(), np.repeat(weight, self.n),
+                minlength=3 * self.n
+            ).reshape(self.n, 3)
+            yield scale, size, weight.sum(), (weight ** 2).sum(), totals
+
+    def conditional(self, genes, i):
+        """
+        Return the distribution of person i's gene count given everyone
+        else's, for each row of `genes`.
+        """
+        chains = len(genes)
+        if self.mothers[i] < 0:
+            log_p = np.tile(np.log(self.prior), (chains, 1))
+        else:
+            log_p = self.log_inheritance[
+                genes[:, self.mothers[i]], genes[:, self.fathers[i]]
+            ]
+        log_p = log_p + self.log_likelihood[i]
+        for child, other, is_mother in self.children[i]:
+            if is_mother:
+                log_p += self.log_inheritance[
+                    :, genes[:, other], genes[:, child]
+                ].T
+            else:
+                log_p += self.log_inheritance[
+                    genes[:, other], :, genes[:, child]
+                ]
+        p = np.exp(log_p - log_p.max(axis=1, keepdims=True))
+        return p / p.sum(axis=1, keepdims=True)
+
+    def gibbs(self, rng, deadline, chains=BATCH_SIZE, groups=GROUPS):
+        """
+        Run Gibbs chains until `deadline`, starting from forward samples.
+        Return batches like `likelihood_weighting`, one per group of
+        chains, covering every sweep after burn-in; burn-in always
+        finishes, even past the deadline. Each update contributes its
+        full conditional distribution rather than the sampled gene
+        count.
+        """
+        genes, _ = self.forward(rng, chains)
+        starts = np.arange(groups) * chains // groups
+        totals = np.zeros((groups, self.n, 3))
+        sweeps = 0
+        while time.time() < deadline or sweeps <= BURN_IN:
+            for i in range(self.n):
+                p = self.conditional(genes, i)
+                genes[:, i] = choose(rng, p)
+                if sweeps >= BURN_IN:
+                    totals[:, i] += np.add.reduceat(p, starts)
+            sweeps += 1
+
+        kept = sweeps - BURN_IN
+        size = np.diff(starts, append=chains) * kept
+        return [
+            (0.0, size[g], size[g], size[g], totals[g])
+            for g in range(groups)
+        ]
+
+
+def choose(rng, probs):
+    """
+    Sample an index from each row of a matrix of probabilities.
+    """
+    cumulative = probs.cumsum(axis=1)
+    draws = rng.random(len(probs)) * cumulative[:, -1]
+    return (draws[:, None] >= cumulative).sum(axis=1)
+
+
+def run_chain(people, method, seed, deadline):
+    """
+    Run one sampler until `deadline` and return its list of batches.
+    """
+    sampler = Sampler(people)
+    rng = np.random.default_rng(seed)
+    if method == "likelihood":
+        return list(sampler.likelihood_weighting(rng, deadline))
+    return sampler.gibbs(rng, deadline)
+
+
+def estimate(people, method="gibbs", budget=BUDGET, processes=None,
+             seed=0):
+    """
+    Estimate every person's gene and trait distributions by sampling in
+    a pool of processes for about `budget` seconds.
+
+    Return a tuple (probabilities, errors, stats). `probabilities` and
+    `errors` are dictionaries in the format of `main` in heredity.py,
+    holding the estimates and their standard errors, which come from
+    the spread between independent batches and are NaN if fewer than
+    two finished in time. `stats` holds the number of batches and of
+    samples, and the effective sample size. For likelihood weighting
+    that is Kish's, from the spread of the weights: with a lot of
+    evidence, a few samples can carry almost all the weight, and the
+    errors are then unreliable too. For Gibbs sampling it comes from
+    the standard errors (see `effective_samples`), so it reflects
+    correlation along the chains.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}")
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    sampler = Sampler(people)
+    deadline = time.time() + budget
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(run_chain, [
+            (people, method, [seed, chain], deadline)
+            for chain in range(processes)
+        ])
+    batches = [batch for result in results for batch in result]
+    if not batches:
+        raise RuntimeError("No samples were drawn within the time budget")
+
+    # Bring every batch to a common weight scale
+    scales = np.array([batch[0] for batch in batches])
+    factor = np.exp(scales - scales.max())
+    weights = factor * np.array([batch[2] for batch in batches])
+    squares = factor ** 2 * np.array([batch[3] for batch in batches])
+    genes = factor[:, None, None] * np.array([batch[4] for batch in batches])
+    traits = np.einsum("big,igt->bit", genes, sampler.trait_given_genes)
+
+    probabilities = {name: {} for name in sampler.names}
+    errors = {name: {} for name in sampler.names}
+    for field, totals, values in [
+        ("gene", genes, GENES), ("trait", traits, TRAITS)
+    ]:
+        means, spread = ratio_estimate(totals, weights)
+        for i, name in enumerate(sampler.names):
+            probabilities[name][field] = dict(zip(values, means[i].tolist()))
+            errors[name][field] = dict(zip(values, spread[i].tolist()))
+        if field == "gene":
+            gene_means, gene_errors = means, spread
+
+    samples = sum(int(batch[1]) for batch in batches)
+    if method == "likelihood":
+        effective = float(weights.sum() ** 2 / squares.sum())
+    else:
+        effective = effective_samples(gene_means, gene_errors, samples)
+    stats = {
+        "batches": len(batches),
+        "samples": samples,
+        "effective_samples": effective,
+    }
+    return probabilities, errors, stats
+
+
+def effective_samples(means, errors, samples):
+    """
+    Return the number of independent draws that would estimate the
+    least certain probability in `means` as precisely as the standard
+    `errors` say it was: p (1 - p) / se², minimised over probabilities
+    not already settled at 0 or 1. Correlation along Gibbs chains
+    widens the errors, so this can be far below `samples`.
+
+    Return NaN if the errors are unknown, and `samples` if every
+    probability is settled.
+    """
+    variance = means * (1 - means)
+    uncertain = variance > 1e-12
+    if not uncertain.any():
+        return float(samples)
+    with np.errstate(divide="ignore"):
+        ratios = variance[uncertain] / errors[uncertain] ** 2
+    return float(ratios.min())
+
+
+def ratio_estimate(totals, weights):
+    """
+    Given per-batch weighted totals and total weights, return the pooled
+    ratio estimate and its standard error, treating batches as
+    independent.
+    """
+    total_weight = weights.sum()
+    means = totals.sum(axis=0) / total_weight
+    if len(weights) < 2:
+        return means, np.full_like(means, np.nan)
+    residuals = totals - means * weights[:, None, None]
+    batches = len(weights)
+    variance = (
+        (residuals ** 2).sum(axis=0) * batches / (batches - 1)
+    ) / total_weight ** 2
+    return means, np.sqrt(variance)
+
+
+def print_estimates(people, probabilities, errors):
+    """
+    Print each person's gene and trait distributions with their
+    standard errors.
+    """
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                error = errors[person][field][value]
+                print(f"    {value}: {p:.4f} ± {error:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate heredity probabilities by sampling."
+    )
+    parser.add_argument("data", help="family CSV file")
+    parser.add_argument("--method", choices=METHODS, default="gibbs")
+    parser.add_argument("--seconds", type=float, default=BUDGET,
+                        help="wall-clock budget")
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    people = load_data(args.data)
+    probabilities, errors, stats = estimate(
+        people, args.method, args.seconds, args.processes, args.seed
+    )
+    print_estimates(people, probabilities, errors)
+    print(f"{stats['samples']} samples in {stats['batches']} batches, "
+          f"effective sample size {stats['effective_samples']:.0f}")
+    if not stats["effective_samples"] >= MIN_EFFECTIVE_SAMPLES:
+        advice = (
+            "--method gibbs or a longer budget"
+            if args.method == "likelihood" else "a longer budget"
+        )
+        print("Too few effective samples for reliable estimates; "
+              f"try {advice}")
+
+
+if __name__ == "__main__":
+    main()
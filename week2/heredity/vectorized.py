@@ -0,0 +1,144 @@
+import sys
+
+import numpy as np
+
+from factors import GENES, TRAITS, gene_prior, inheritance_table, trait_table
+from heredity import load_data, print_probabilities
+
+# Assignments evaluated at a time
+CHUNK_SIZE = 1 << 16
+
+
+class Family():
+    """
+    A family, as returned by `load_data`, prepared for evaluating the
+    joint probability of every assignment at once.
+
+    Gene assignments are numbered in base 3, person i's gene count being
+    digit i (an index into GENES), and decoded into integer arrays with
+    one row per assignment. Traits given as evidence are fixed; the rest
+    are numbered in base 2 (an index into TRAITS per bit), and every
+    gene assignment is combined with every trait assignment by
+    broadcasting.
+    """
+
+    def __init__(self, people):
+        self.people = people
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        self.n = n
+
+        # Each person's term of the joint probability depends on their
+        # own gene count and trait and, for children, their parents'
+        # gene counts. All terms live in one flat table of logs: person
+        # i's term is at offsets[i] + 18 * mother's genes + 6 * father's
+        # genes + 2 * own genes + trait, founders having no parents
+        log_prior = np.log(gene_prior())
+        log_inheritance = np.log(inheritance_table())
+        log_traits = np.log(trait_table())
+        tables = []
+        self.offsets = np.zeros(n, dtype=np.int64)
+        self.mothers = np.full(n, n, dtype=np.int64)
+        self.fathers = np.full(n, n, dtype=np.int64)
+        offset = 0
+        for i, name in enumerate(self.names):
+            if people[name]["mother"] is None:
+                table = log_prior[:, None] + log_traits
+            else:
+                self.mothers[i] = index[people[name]["mother"]]
+                self.fathers[i] = index[people[name]["father"]]
+                table = log_inheritance[:, :, :, None] + log_traits
+            self.offsets[i] = offset
+            tables.append(table.ravel())
+            offset += table.size
+        self.table = np.concatenate(tables)
+
+        self.free = np.array([
+            i for i, name in enumerate(self.names)
+            if people[name]["trait"] is None
+        ], dtype=np.int64)
+        self.observed = np.array([
+            TRAITS.index(people[name]["trait"])
+            if people[name]["trait"] is not None else 0
+            for name in self.names
+        ], dtype=np.int64)
+        self.observed[self.free] = 0
+
+        # Row k holds the traits, as TRAITS indices, of the free people
+        # in trait assignment k
+        f = len(self.free)
+        self.trait_bits = (
+            np.arange(2 ** f)[:, None] >> np.arange(f) & 1
+        ).astype(float)
+        self.radix = 3 ** np.arange(n)
+
+    def genes(self, start, stop):
+        """
+        Return the gene assignments start..stop-1, as an array with one
+        row per assignment and one column per person.
+        """
+        codes = np.arange(start, stop, dtype=np.int64)
+        return codes[:, None] // self.radix % 3
+
+    def log_joint(self, genes):
+        """
+        Return the log joint probability of each combination of the given
+        gene assignments (rows) with each trait assignment (columns).
+        """
+        padded = np.pad(genes, ((0, 0), (0, 1)))
+        terms = (
+            self.offsets + 2 * genes
+            + 18 * padded[:, self.mothers] + 6 * padded[:, self.fathers]
+        )
+        fixed = self.table[terms + self.observed].sum(axis=1)
+        free = terms[:, self.free]
+        change = self.table[free + 1] - self.table[free]
+        return fixed[:, None] + change @ self.trait_bits.T
+
+    def probabilities(self, chunk_size=CHUNK_SIZE):
+        """
+        Return gene and trait distributions for everyone, in the same
+        format as `main` in heredity.py, by summing the joint
+        probability of every assignment consistent with the evidence.
+        """
+        n = self.n
+        count = 3 ** n
+        rows = max(1, chunk_size // len(self.trait_bits))
+        cells = 3 * np.arange(n)
+        gene_totals = np.zeros(3 * n)
+        trait_totals = np.zeros(len(self.trait_bits))
+        for start in range(0, count, rows):
+            genes = self.genes(start, min(start + rows, count))
+            p = np.exp(self.log_joint(genes))
+            gene_totals += np.bincount(
+                (cells + genes).ravel(), np.repeat(p.sum(axis=1), n),
+                minlength=3 * n
+            )
+            trait_totals += p.sum(axis=0)
+
+        gene_totals = gene_totals.reshape(n, 3)
+        gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+        traits = np.zeros((n, 2))
+        traits[np.arange(n), self.observed] = 1
+        share = trait_totals @ self.trait_bits / trait_totals.sum()
+        traits[self.free, 0] = 1 - share
+        traits[self.free, 1] = share
+        return {
+            name: {
+                "gene": dict(zip(GENES, gene_totals[i].tolist())),
+                "trait": dict(zip(TRAITS, traits[i].tolist())),
+            }
+            for i, name in enumerate(self.names)
+        }
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python vectorized.py data.csv")
+    people = load_data(sys.argv[1])
+    print_probabilities(people, Family(people).probabilities())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import time
+
+import numpy as np
+
+from incremental import IncrementalPageRank
+from pagerank import DAMPING, crawl
+from sparse import LinkGraph, METHODS, NORMS, TOLERANCE, solve
+
+# Random graphs to compare solvers on: (pages, links per page)
+GRAPHS = [
+    (10000, 5),
+    (100000, 10),
+    (1000000, 5),
+]
+
+# Tolerances to compare incremental updates against solving at
+INCREMENTAL_TOLERANCES = [1e-3, 1e-4, 1e-5, 1e-6, 1e-8]
+# Updates to time at each tolerance, and random links each one adds
+UPDATES = 20
+CHANGES = 2
+
+
+def random_graph(pages, links, seed=0):
+    """
+    Return a LinkGraph of `pages` pages with about `links` links each,
+    whose destinations favour low-numbered pages so that ranks differ.
+    """
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, pages, pages * links)
+    dst = (pages * rng.random(pages * links) ** 2).astype(np.int64)
+    return LinkGraph(range(pages), src, dst)
+
+
+def compare(graph, damping_factor, tolerance, norm):
+    """
+    Run every solver on `graph` and print its telemetry.
+    """
+    reference = None
+    for method in METHODS:
+        ranks, telemetry = solve(
+            graph, damping_factor, method, tolerance, norm
+        )
+        if reference is None:
+            reference = ranks
+        print(f"  {telemetry}")
+        print(f"    L1 distance from jacobi: "
+              f"{np.abs(ranks - reference).sum():.3e}")
+
+
+def to_corpus(graph):
+    """
+    Return the links of `graph` as a corpus dictionary of page numbers.
+    """
+    links = graph.matrix.tocsc()
+    return {
+        page: set(links.indices[start:end].tolist())
+        for page, (start, end) in enumerate(
+            zip(links.indptr[:-1], links.indptr[1:])
+        )
+    }
+
+
+def check_replace_links(pages=50, trials=200, seed=0):
+    """
+    Replace the links of random pages of small random graphs, many of
+    them with no links or no in-links, and check that every result
+    matches the graph built from scratch with `from_corpus`.
+    Raise RuntimeError if one does not.
+    """
+    rng = np.random.default_rng(seed)
+    for trial in range(trials):
+        graph = random_graph(pages, int(rng.integers(0, 4)), seed=trial)
+        corpus = to_corpus(graph)
+        for _ in range(5):
+            links = {
+                int(page): rng.integers(
+                    0, pages, rng.integers(0, 4)
+                ).tolist()
+                for page in rng.integers(0, pages, rng.integers(1, 8))
+            }
+            graph.replace_links(links)
+            for page, targets in links.items():
+                corpus[page] = set(targets) - {page}
+            expected = LinkGraph.from_corpus(corpus)
+            if (abs(graph.matrix - expected.matrix).max() > 1e-12
+                    or (graph.dangling != expected.dangling).any()):
+                raise RuntimeError(
+                    f"replace_links({links!r}) disagrees with from_corpus "
+                    f"in trial {trial}"
+                )
+
+
+def compare_incremental(graph, damping_factor, tolerance, seed=0):
+    """
+    Add CHANGES random links to `graph` at a time, UPDATES times, and
+    print how long IncrementalPageRank takes to update the ranks against
+    `solve` on the same updated graph, built from scratch. The solve is
+    followed by `to_dict`, so that both give the same dictionary of
+    ranks.
+    """
+    n = len(graph)
+    incremental = IncrementalPageRank(to_corpus(graph), damping_factor,
+                                      tolerance)
+    rng = np.random.default_rng(seed)
+    update_times = []
+    solve_times = []
+    local = 0
+    distance = 0
+    for _ in range(UPDATES):
+        added = rng.integers(0, n, (CHANGES, 2)).tolist()
+        start = time.perf_counter()
+        incremental.update(map(tuple, added))
+        update_times.append(time.perf_counter() - start)
+        local += incremental.stats["mode"] == "local"
+
+        graph = LinkGraph.from_corpus(incremental.corpus)
+        start = time.perf_counter()
+        ranks, _ = solve(graph, damping_factor, tolerance=tolerance)
+        graph.to_dict(ranks)
+        solve_times.append(time.perf_counter() - start)
+        x = incremental.x / incremental.x.sum()
+        distance = max(distance, np.abs(x - ranks).sum())
+
+    print(f"  tolerance {tolerance:g}: {local}/{UPDATES} updates local, "
+          f"median {np.median(update_times):.4f}s against "
+          f"{np.median(solve_times):.4f}s to solve, "
+          f"L1 distance up to {distance:.1e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare PageRank solvers."
+    )
+    parser.add_argument("corpus", nargs="*",
+                        help="corpus directories (random graphs if none)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--norm", choices=list(NORMS), default="l1")
+    parser.add_argument("--damping", type=float, default=DAMPING)
+    parser.add_argument("--incremental", action="store_true",
+                        help="time incremental updates against solving "
+                             "from scratch instead")
+    args = parser.parse_args()
+
+    if args.corpus:
+        graphs = [
+            (directory, LinkGraph.from_corpus(crawl(directory)))
+            for directory in args.corpus
+        ]
+    else:
+        graphs = [
+            (f"{pages} pages, {links} links per page",
+             random_graph(pages, links))
+            for pages, links in GRAPHS
+        ]
+
+    for name, graph in graphs:
+        if args.incremental:
+            check_replace_links()
+            print(f"{name}, {CHANGES} links added per update")
+            for tolerance in INCREMENTAL_TOLERANCES:
+                compare_incremental(graph, args.damping, tolerance)
+            continue
+        print(f"{name}, tolerance {args.tolerance:g} ({args.norm})")
+        compare(graph, args.damping, args.tolerance, args.norm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import mmap
+import multiprocessing
+import os
+import re
+import sys
+import time
+from array import array
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Number of files handed to a worker at a time
+BATCH_SIZE = 256
+
+# Files at least this large are memory-mapped rather than read into memory
+MMAP_THRESHOLD = 1 << 20
+
+# Page numbers of the corpus being crawled, set in each worker
+_index = None
+
+
+def _init_worker(index):
+    global _index
+    _index = index
+
+
+def _links(data, page):
+    """
+    Return the set of page numbers linked to from `data`, other than `page`.
+    """
+    links = set()
+    for match in LINK.finditer(data):
+        link = _index.get(match.group(1).decode())
+        if link is not None and link != page:
+            links.add(link)
+    return links
+
+
+def _crawl_batch(batch):
+    """
+    Scan a batch of (page number, path) pairs for links.
+    Return arrays of link sources and destinations (as page numbers)
+    and the number of bytes read.
+    """
+    src = array("i")
+    dst = array("i")
+    size = 0
+    for page, path in batch:
+        with open(path, "rb") as f:
+            length = os.fstat(f.fileno()).st_size
+            size += length
+            if length == 0:
+                continue
+            if length < MMAP_THRESHOLD:
+                links = _links(f.read(), page)
+            else:
+                with mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                ) as data:
+                    links = _links(data, page)
+        src.extend([page] * len(links))
+        dst.extend(links)
+    return src, dst, size
+
+
+def list_pages(directory):
+    """
+    Return the sorted names of the HTML pages in `directory`.
+    """
+    return sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html") and entry.is_file()
+    )
+
+
+def crawl_batches(directory, pages, processes=None, batch_size=BATCH_SIZE):
+    """
+    Parse the pages of a directory for links across a pool of processes.
+    Yield a tuple (src, dst, size) for each batch of pages as it is
+    parsed: arrays of link sources and destinations (as positions in
+    `pages`) and the number of bytes read.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    paths = [
+        (i, os.path.join(directory, page)) for i, page in enumerate(pages)
+    ]
+    batches = [
+        paths[i:i + batch_size] for i in range(0, len(paths), batch_size)
+    ]
+    with multiprocessing.Pool(
+        processes, initializer=_init_worker, initargs=(index,)
+    ) as pool:
+        yield from pool.imap_unordered(_crawl_batch, batches)
+
+
+def crawl_edges(directory, processes=None, batch_size=BATCH_SIZE):
+    """
+    Parse a directory of HTML pages for links across a pool of processes.
+
+    Return a tuple (pages, src, dst, stats): `pages` lists the page names,
+    `src` and `dst` are arrays of page numbers such that page `src[k]`
+    links to page `dst[k]`, and `stats` is a dictionary with the number of
+    pages and bytes read, the time taken, and the resulting rates.
+    """
+    start = time.perf_counter()
+    pages = list_pages(directory)
+
+    src = array("i")
+    dst = array("i")
+    size = 0
+    for batch_src, batch_dst, read in crawl_batches(
+        directory, pages, processes, batch_size
+    ):
+        src.extend(batch_src)
+        dst.extend(batch_dst)
+        size += read
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "pages": len(pages),
+        "links": len(src),
+        "bytes": size,
+        "seconds": seconds,
+        "pages_per_second": len(pages) / seconds if seconds else 0,
+        "bytes_per_second": size / seconds if seconds else 0,
+    }
+    return pages, src, dst, stats
+
+
+def to_corpus(pages, src, dst):
+    """
+    Convert the output of `crawl_edges` to a corpus dictionary
+    in the format returned by `crawl`.
+    """
+    corpus = {page: set() for page in pages}
+    for s, d in zip(src, dst):
+        corpus[pages[s]].add(pages[d])
+    return corpus
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python crawler.py corpus [processes]")
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    _, _, _, stats = crawl_edges(sys.argv[1], processes)
+    print(f"Crawled {stats['pages']} pages, {stats['links']} links, "
+          f"{stats['bytes']} bytes in {stats['seconds']:.2f}s")
+    print(f"  {stats['pages_per_second']:.0f} pages/s")
+    print(f"  {stats['bytes_per_second'] / 1e6:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import mmap
+import struct
+import sys
+import time
+
+import numpy as np
+
+from crawler import crawl_edges
+from pagerank import DAMPING
+from sparse import LinkGraph, power_iteration
+
+# File layout: magic, then the number of pages and links and the byte
+# lengths of the three sections that follow (page names, out-degrees,
+# link deltas)
+MAGIC = b"PRGRAPH1"
+HEADER = struct.Struct("<8s5Q")
+
+
+def encode_varints(values):
+    """
+    Encode an array of non-negative integers as LEB128 varints: seven bits
+    per byte, low bits first, with the high bit set on all but the last
+    byte of each value.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b""
+    bits = np.zeros(len(values), dtype=np.int64)
+    rest = values >> 7
+    while rest.any():
+        bits += rest > 0
+        rest >>= 7
+    lengths = bits + 1
+
+    ends = np.cumsum(lengths)
+    owner = np.repeat(np.arange(len(values)), lengths)
+    shift = np.arange(ends[-1]) - np.repeat(ends - lengths, lengths)
+    data = (values[owner] >> (7 * shift).astype(np.uint64)) & 0x7f
+    data |= (shift < lengths[owner] - 1).astype(np.uint64) << 7
+    return data.astype(np.uint8).tobytes()
+
+
+def decode_varints(data, count):
+    """
+    Decode `count` LEB128 varints from a buffer into an int64 array.
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    last = data < 0x80
+    ends = np.flatnonzero(last)
+    if len(ends) != count:
+        raise ValueError("Corrupt graph file")
+    owner = np.cumsum(last) - last
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    shift = np.arange(len(data)) - starts[owner]
+
+    values = np.zeros(count, dtype=np.int64)
+    payload = (data & 0x7f).astype(np.int64)
+    for k in range(shift.max(initial=-1) + 1):
+        byte = shift == k
+        values[owner[byte]] |= payload[byte] << (7 * k)
+    return values
+
+
+def save_graph(path, pages, src, dst):
+    """
+    Write a link graph, given as page names and parallel arrays of link
+    sources and destinations (as returned by `crawl_edges`), to `path`.
+
+    Each page's links are sorted and stored as the gaps between
+    successive destinations, so that both the out-degrees and the gaps
+    are mostly small numbers that fit in one or two varint bytes.
+    Duplicate links and links from a page to itself are dropped.
+    """
+    n = len(pages)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    keep = src != dst
+    edges = np.sort(src[keep] * n + dst[keep])
+    edges = edges[np.diff(edges, prepend=-1) != 0]
+    src, dst = edges // n, edges % n
+
+    degree = np.bincount(src, minlength=n)
+    gaps = np.diff(dst, prepend=0)
+    first = np.cumsum(degree) - degree
+    first = first[degree > 0]
+    gaps[first] = dst[first]
+
+    names = b"\0".join(page.encode() for page in pages)
+    degrees = encode_varints(degree)
+    deltas = encode_varints(gaps)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, n, len(edges), len(names), len(degrees), len(deltas)
+        ))
+        f.write(names)
+        f.write(degrees)
+        f.write(deltas)
+
+
+def save_corpus(path, corpus):
+    """
+    Write a corpus dictionary as returned by `crawl` to `path`.
+    """
+    pages = list(corpus)
+    graph = LinkGraph.from_corpus(corpus)
+    links = graph.matrix.tocoo()
+    save_graph(path, pages, links.col, links.row)
+
+
+def load_edges(path):
+    """
+    Read a graph file written by `save_graph`.
+    Return a tuple (pages, src, dst) in the format of `crawl_edges`.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, n, links, names, degrees, deltas = HEADER.unpack_from(
+                data
+            )
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a graph file")
+            start = HEADER.size
+            pages = (
+                data[start:start + names].decode().split("\0") if n else []
+            )
+            start += names
+            view = memoryview(data)
+            try:
+                degree = decode_varints(view[start:start + degrees], n)
+                start += degrees
+                gaps = decode_varints(view[start:start + deltas], links)
+            finally:
+                view.release()
+
+    src = np.repeat(np.arange(n), degree)
+    first = np.cumsum(degree) - degree
+    first = first[degree > 0]
+
+    # Undo the gaps within each page's run of links
+    dst = np.cumsum(gaps)
+    base = np.zeros(links, dtype=np.int64)
+    base[first] = dst[first] - gaps[first]
+    dst -= np.maximum.accumulate(base)
+    return pages, src, dst
+
+
+def load_graph(path):
+    """
+    Read a graph file written by `save_graph` into a LinkGraph.
+    """
+    return LinkGraph(*load_edges(path))
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "save":
+        pages, src, dst, stats = crawl_edges(sys.argv[2])
+        save_graph(sys.argv[3], pages, src, dst)
+        print(f"Saved {stats['pages']} pages, {stats['links']} links "
+              f"to {sys.argv[3]}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "rank":
+        start = time.perf_counter()
+        graph = load_graph(sys.argv[2])
+        loaded = time.perf_counter()
+        ranks = graph.to_dict(power_iteration(graph, DAMPING))
+        print(f"Loaded in {loaded - start:.2f}s, "
+              f"ranked in {time.perf_counter() - loaded:.2f}s")
+        print(f"PageRank Results from Iteration")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+    else:
+        sys.exit("Usage: python graphstore.py save corpus graph\n"
+                 "       python graphstore.py rank graph")
+
+
+if __name__ == "__main__":
+    main()
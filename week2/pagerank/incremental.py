@@ -0,0 +1,223 @@
+import heapq
+
+import numpy as np
+
+from sparse import LinkGraph, TOLERANCE, solve
+
+# Give up on a local update once it would touch this share of all links
+WORK_LIMIT = 0.01
+
+
+def diff_corpus(old, new):
+    """
+    Compare two corpora as returned by `crawl`.
+    Return a pair (added, removed) of sets of (page, link) pairs.
+    """
+    added = set()
+    removed = set()
+    for page in old.keys() | new.keys():
+        old_links = old.get(page, set())
+        new_links = new.get(page, set())
+        added.update((page, link) for link in new_links - old_links)
+        removed.update((page, link) for link in old_links - new_links)
+    return added, removed
+
+
+class IncrementalPageRank():
+    """
+    PageRank of a corpus whose links change over time.
+
+    Besides the ranks, keeps the residual of the PageRank equations at the
+    current ranks, i.e. how far one more iteration would move each page,
+    and the residual mass, the sum of their absolute values. When links
+    change, only the residuals of pages linked to from the changed pages
+    move, and rank is pushed out from the pages with the largest residuals
+    until the mass is below (1 - damping_factor) * tolerance again, which
+    keeps the ranks within the tolerance of the exact ones. Changes whose
+    residual would spread over too much of the graph, or that add new
+    pages, fall back to iterating over the whole graph, starting from the
+    previous ranks moved by their residuals. Only that needs the sparse
+    link graph, so changed links reach it just before.
+    """
+
+    def __init__(self, corpus, damping_factor, tolerance=TOLERANCE):
+        self.corpus = {page: set(links) for page, links in corpus.items()}
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+        self.links = sum(len(links) for links in self.corpus.values())
+        self.stats = {"mode": "global", "pushes": 0, "iterations": 0}
+        self.build()
+        self.solve()
+
+    def build(self):
+        """
+        Build the sparse link graph from scratch.
+        """
+        self.graph = LinkGraph.from_corpus(self.corpus)
+        self.pages = self.graph.pages
+        self.index = self.graph.index
+        # Pages whose links changed since the graph was last updated
+        self.stale = set()
+
+    def solve(self, start=None):
+        """
+        Compute ranks over the whole graph, starting from the rank
+        vector `start` if given.
+        """
+        if self.stale:
+            self.graph.replace_links({
+                self.index[page]: [
+                    self.index[link] for link in self.corpus[page]
+                ]
+                for page in self.stale
+            })
+            self.stale = set()
+        self.x, telemetry = solve(
+            self.graph, self.damping_factor,
+            tolerance=(1 - self.damping_factor) * self.tolerance,
+            ranks=start
+        )
+        self.residual = self.graph.step(self.x, self.damping_factor) - self.x
+        self.offset = 0
+        self.mass = np.abs(self.residual).sum()
+        self.stats["mode"] = "global"
+        self.stats["iterations"] = telemetry.iterations
+
+    @property
+    def ranks(self):
+        """
+        Current PageRank values, as a dictionary keyed by page name.
+        """
+        return dict(zip(self.pages, (self.x / self.x.sum()).tolist()))
+
+    def update(self, added=(), removed=()):
+        """
+        Add and remove links, given as iterables of (page, link) pairs,
+        and update the ranks. Return the new ranks.
+        """
+        added = set(added)
+        removed = set(removed)
+        self.stats = {"mode": "local", "pushes": 0, "iterations": 0}
+        pages = set(page for edge in added | removed for page in edge)
+        if not pages <= self.corpus.keys():
+            ranks = self.ranks
+            for page in pages - self.corpus.keys():
+                self.corpus[page] = set()
+            self.apply(added, removed)
+            self.build()
+            n = len(self.pages)
+            start = np.array([ranks.get(page, 1 / n) for page in self.pages])
+            self.solve(start / start.sum())
+            return self.ranks
+
+        # Move the residuals of pages linked to from the changed pages
+        changed = self.apply(added, removed)
+        self.stale.update(changed)
+        d = self.damping_factor
+        for page, old_links in changed.items():
+            rank = self.x[self.index[page]]
+            self.spread(old_links, -d * rank)
+            self.spread(self.corpus[page], d * rank)
+
+        if changed and not self.push(changed):
+            start = self.x + self.residual + self.offset
+            self.solve(start / start.sum())
+        return self.ranks
+
+    def apply(self, added, removed):
+        """
+        Apply link changes to the corpus.
+        Return a dictionary mapping each changed page to its old links.
+        """
+        changed = {}
+        for page, link in removed:
+            if link in self.corpus[page]:
+                changed.setdefault(page, set(self.corpus[page]))
+                self.corpus[page].discard(link)
+                self.links -= 1
+        for page, link in added:
+            if page != link and link not in self.corpus[page]:
+                changed.setdefault(page, set(self.corpus[page]))
+                self.corpus[page].add(link)
+                self.links += 1
+        return {
+            page: links for page, links in changed.items()
+            if links != self.corpus[page]
+        }
+
+    def spread(self, links, amount):
+        """
+        Add `amount` of residual spread evenly over the pages in `links`,
+        or over every page if there are none, keeping the residual mass
+        up to date. Return the numbers of the pages whose residual moved.
+        """
+        if not links:
+            # Every page moves; bound the mass rather than sum it again
+            self.offset += amount / len(self.pages)
+            self.mass += abs(amount)
+            return []
+        share = amount / len(links)
+        moved = []
+        for link in links:
+            v = self.index[link]
+            before = abs(self.residual[v] + self.offset)
+            self.residual[v] += share
+            self.mass += abs(self.residual[v] + self.offset) - before
+            moved.append(v)
+        return moved
+
+    def push(self, changed):
+        """
+        Push rank out of the pages with the largest residuals until the
+        residual mass is below (1 - damping_factor) * tolerance. Return
+        False, without pushing, if the mass suggests that would touch too
+        much of the graph, and as soon as it turns out to.
+
+        Pushing a residual r moves it into the page's rank and spreads
+        damping_factor * r over the page's links, which sheds about
+        (1 - damping_factor) * r of mass. Shedding the mass above the
+        target takes at least mass / ((1 - damping_factor) * r) pushes
+        while residuals are of size r, and they shrink as they spread;
+        before pushing, r is taken to be the target itself.
+        """
+        d = self.damping_factor
+        n = len(self.pages)
+        residual = self.residual
+        target = (1 - d) * self.tolerance
+        budget = WORK_LIMIT * max(self.links, n)
+        degree = self.links / n
+        excess = (self.mass - target) * degree
+        if excess > budget * (1 - d) * target:
+            return False
+
+        # Latest priority of each page in the heap, to skip older entries
+        queued = {}
+        for page, old_links in changed.items():
+            for link in old_links | self.corpus[page]:
+                v = self.index[link]
+                queued[v] = -abs(residual[v] + self.offset)
+        heap = [(size, v) for v, size in queued.items()]
+        heapq.heapify(heap)
+        work = 0
+        while self.mass >= target:
+            if not heap:
+                return False
+            size, u = heapq.heappop(heap)
+            if queued.get(u) != size:
+                continue
+            del queued[u]
+            r = residual[u] + self.offset
+            excess = (self.mass - target) * degree
+            if excess > (budget - work) * (1 - d) * abs(r):
+                return False
+            self.x[u] += r
+            residual[u] = -self.offset
+            self.mass -= abs(r)
+            self.stats["pushes"] += 1
+
+            links = self.corpus[self.pages[u]]
+            work += len(links)
+            for v in self.spread(links, d * r):
+                queued[v] = -abs(residual[v] + self.offset)
+                heapq.heappush(heap, (queued[v], v))
+        return True
@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from crawler import crawl_batches, list_pages
+from pagerank import DAMPING
+from sparse import TOLERANCE, MAX_ITERATIONS
+
+# Destination pages per block; each block's links must fit in memory
+# while the store is built
+BLOCK_PAGES = 1 << 20
+
+# Links read from disk at a time while ranking
+READ_EDGES = 1 << 22
+
+EDGE = np.dtype([("src", "<i4"), ("dst", "<i4")])
+
+
+class EdgeStore():
+    """
+    A link graph kept on disk, for graphs too large for memory.
+
+    Links are split by destination into blocks of `block_pages` pages.
+    Each block is a file of (src, dst) page number pairs sorted by
+    destination, so an iteration reads every block once from start to
+    finish and only writes to that block's slice of the new ranks.
+    Apart from the rank vectors, only each page's number of links is
+    held in memory.
+    """
+
+    def __init__(self, directory):
+        """
+        Open a store previously written by `build`.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "graph.json")) as f:
+            meta = json.load(f)
+        self.n = meta["pages"]
+        self.block_pages = meta["block_pages"]
+        self.links = meta["links"]
+        self.out_degree = np.load(os.path.join(directory, "degree.npy"))
+        self.dangling = self.out_degree == 0
+
+    def __len__(self):
+        return self.n
+
+    @classmethod
+    def build(cls, directory, n, batches, block_pages=BLOCK_PAGES):
+        """
+        Write a store for a graph of `n` pages to `directory`.
+        `batches` yields pairs of arrays of link sources and destinations
+        (as page numbers). Duplicate links and links from a page to
+        itself are dropped.
+        """
+        os.makedirs(directory, exist_ok=True)
+        blocks = max(1, -(-n // block_pages))
+
+        # Scatter links into unsorted block files by destination
+        parts = [
+            cls.block_path(directory, b) + ".tmp" for b in range(blocks)
+        ]
+        files = [open(path, "wb") for path in parts]
+        try:
+            for src, dst in batches:
+                edges = np.empty(len(src), dtype=EDGE)
+                edges["src"] = src
+                edges["dst"] = dst
+                edges = edges[edges["src"] != edges["dst"]]
+                block = edges["dst"] // block_pages
+                edges = edges[np.argsort(block, kind="stable")]
+                counts = np.bincount(block, minlength=blocks)
+                ends = np.cumsum(counts)
+                for b in np.flatnonzero(counts):
+                    edges[ends[b] - counts[b]:ends[b]].tofile(files[b])
+        finally:
+            for f in files:
+                f.close()
+
+        # Sort each block by destination in memory
+        degree = np.zeros(n, dtype=np.int64)
+        links = 0
+        for b, part in enumerate(parts):
+            edges = np.fromfile(part, dtype=EDGE)
+            key = edges["dst"].astype(np.int64) * n + edges["src"]
+            key = np.sort(key)
+            key = key[np.diff(key, prepend=-1) != 0]
+            edges = np.empty(len(key), dtype=EDGE)
+            edges["dst"] = key // n
+            edges["src"] = key % n
+            edges.tofile(cls.block_path(directory, b))
+            np.add.at(degree, edges["src"], 1)
+            links += len(edges)
+            os.remove(part)
+
+        np.save(os.path.join(directory, "degree.npy"), degree)
+        with open(os.path.join(directory, "graph.json"), "w") as f:
+            json.dump(
+                {"pages": n, "block_pages": block_pages, "links": links}, f
+            )
+        return cls(directory)
+
+    @staticmethod
+    def block_path(directory, block):
+        return os.path.join(directory, f"block{block:05d}.edges")
+
+    def blocks(self):
+        """
+        Yield a tuple (lo, hi, edges) for each run of at most READ_EDGES
+        links whose destinations lie in the pages lo..hi-1.
+        """
+        for b in range(max(1, -(-self.n // self.block_pages))):
+            lo = b * self.block_pages
+            hi = min(self.n, lo + self.block_pages)
+            path = self.block_path(self.directory, b)
+            if os.path.getsize(path) == 0:
+                continue
+            edges = np.memmap(path, dtype=EDGE, mode="r")
+            for start in range(0, len(edges), READ_EDGES):
+                yield lo, hi, np.array(edges[start:start + READ_EDGES])
+            del edges
+
+    def pagerank(self, damping_factor, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS):
+        """
+        Return the PageRank vector, streaming the links from disk once
+        per iteration until the L1 change between iterations is below
+        `tolerance`.
+        """
+        n = self.n
+        d = damping_factor
+        ranks = np.full(n, 1 / n)
+        linked = ~self.dangling
+        for _ in range(max_iterations):
+            scaled = np.zeros(n)
+            scaled[linked] = ranks[linked] / self.out_degree[linked]
+            spread = ranks[self.dangling].sum() / n
+            new = np.full(n, (1 - d) / n + d * spread)
+            for lo, hi, edges in self.blocks():
+                new[lo:hi] += d * np.bincount(
+                    edges["dst"] - lo, weights=scaled[edges["src"]],
+                    minlength=hi - lo
+                )
+            change = np.abs(new - ranks).sum()
+            ranks = new
+            if change < tolerance:
+                break
+        return ranks / ranks.sum()
+
+
+def build_from_corpus(directory, corpus, block_pages=BLOCK_PAGES):
+    """
+    Write a store for a corpus dictionary as returned by `crawl`.
+    Return the store and its list of page names.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    src = [index[page] for page in pages for _ in corpus[page]]
+    dst = [index[link] for page in pages for link in corpus[page]]
+    store = EdgeStore.build(
+        directory, len(pages), [(src, dst)], block_pages
+    )
+    return store, pages
+
+
+def outofcore_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                       block_pages=BLOCK_PAGES):
+    """
+    Return PageRank values for each page of `corpus`, like
+    `iterate_pagerank`, from a temporary on-disk store.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store, pages = build_from_corpus(directory, corpus, block_pages)
+        ranks = store.pagerank(damping_factor, tolerance)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python outofcore.py corpus store")
+    corpus, directory = sys.argv[1:]
+    pages = list_pages(corpus)
+
+    start = time.perf_counter()
+    if os.path.exists(os.path.join(directory, "graph.json")):
+        store = EdgeStore(directory)
+    else:
+        store = EdgeStore.build(directory, len(pages), (
+            (src, dst) for src, dst, _ in crawl_batches(corpus, pages)
+        ))
+    built = time.perf_counter()
+    ranks = store.pagerank(DAMPING)
+    print(f"Store ready in {built - start:.2f}s, "
+          f"ranked in {time.perf_counter() - built:.2f}s")
+    print(f"PageRank Results from Iteration")
+    for page, rank in zip(pages, ranks.tolist()):
+        print(f"  {page}: {rank:.4f}")
+
+
+if __name__ == "__main__":
+    main()
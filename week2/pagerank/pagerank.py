@@ -62,7 +62,7 @@ def transition_model(corpus, page, damping_factor):
         for key in corpus.keys():
             probabilityDistribution[key] = 1/len(corpus)
     else:
-        random_factor = (1-damping_factor)/len(corpus[page])
+        random_factor = (1-damping_factor)/len(corpus)
         other_factor = damping_factor/len(corpus[page])
 
         for key in corpus.keys():
@@ -0,0 +1,121 @@
+import numpy as np
+
+from sparse import LinkGraph, TOLERANCE, MAX_ITERATIONS
+
+# Teleport distributions to iterate together: wider chunks stop paying
+# for themselves once the rank matrices fall out of cache
+CHUNK_SIZE = 32
+
+# Bytes of rank matrices to hold at a time, which narrows the chunks
+# on very large graphs
+MEMORY_LIMIT = 1 << 28
+
+
+def teleport_matrix(graph, seeds):
+    """
+    Return a dense matrix with one column per seed set, holding the
+    probability of teleporting to each page of `graph`.
+
+    Each seed set is either a collection of page names, teleported to
+    uniformly, or a dictionary mapping page names to weights.
+    """
+    teleport = np.zeros((len(graph), len(seeds)))
+    for column, seed in enumerate(seeds):
+        if not isinstance(seed, dict):
+            seed = dict.fromkeys(seed, 1)
+        for page, weight in seed.items():
+            teleport[graph.index[page], column] = weight
+        total = teleport[:, column].sum()
+        if total <= 0:
+            raise ValueError(f"Seed set {column} has no weight")
+        teleport[:, column] /= total
+    return teleport
+
+
+def chunk_size(graph):
+    """
+    Number of teleport distributions to iterate together: CHUNK_SIZE,
+    or fewer if the four matrices held per chunk would exceed
+    MEMORY_LIMIT.
+    """
+    return max(1, min(
+        CHUNK_SIZE, MEMORY_LIMIT // (4 * 8 * max(1, len(graph)))
+    ))
+
+
+def personalized_chunks(graph, seeds, damping_factor, tolerance=TOLERANCE,
+                        size=None):
+    """
+    Compute personalized PageRank for each seed set, a chunk at a time.
+    Yield pairs (start, ranks), where column j of `ranks` holds the
+    ranks for seed set `start + j`.
+
+    A surfer jumps with probability 1 - `damping_factor` to a page drawn
+    from its seed set instead of to any page. Pages with no links still
+    spread their rank over every page. Each chunk is iterated as one
+    sparse-dense matrix product per step, and columns that have
+    converged drop out of later steps.
+    """
+    n = len(graph)
+    d = damping_factor
+    if size is None:
+        size = chunk_size(graph)
+
+    dangling = graph.dangling / n
+    for start in range(0, len(seeds), size):
+        teleport = teleport_matrix(graph, seeds[start:start + size])
+        ranks = np.empty_like(teleport)
+        active = np.arange(teleport.shape[1])
+        jump = (1 - d) * teleport
+        x = teleport
+        for _ in range(MAX_ITERATIONS):
+            new = graph.matrix @ x
+            new += dangling @ x
+            new *= d
+            new += jump
+            np.subtract(new, x, out=x)
+            np.abs(x, out=x)
+            converged = x.sum(axis=0) < tolerance
+            x = new
+
+            # Set aside columns that have converged
+            if converged.any():
+                ranks[:, active[converged]] = x[:, converged]
+                active = active[~converged]
+                x = x[:, ~converged]
+                jump = jump[:, ~converged]
+            if len(active) == 0:
+                break
+        ranks[:, active] = x
+        yield start, ranks / ranks.sum(axis=0)
+
+
+def personalized_ranks(graph, seeds, damping_factor, tolerance=TOLERANCE,
+                       size=None):
+    """
+    Return a matrix of personalized PageRank values with one row per
+    page of `graph` and one column per seed set.
+    """
+    result = np.empty((len(graph), len(seeds)))
+    for start, ranks in personalized_chunks(
+        graph, seeds, damping_factor, tolerance, size
+    ):
+        result[:, start:start + ranks.shape[1]] = ranks
+    return result
+
+
+def topic_pagerank(corpus, damping_factor, topics, tolerance=TOLERANCE):
+    """
+    Return topic-sensitive PageRank values for a corpus as returned by
+    `crawl`. `topics` maps topic names to seed sets; the result maps
+    each topic name to a dictionary of ranks keyed by page name.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    names = list(topics)
+    ranks = personalized_ranks(
+        graph, [topics[name] for name in names], damping_factor, tolerance
+    )
+    return {
+        name: graph.to_dict(ranks[:, column])
+        for column, name in enumerate(names)
+    }
@@ -0,0 +1,72 @@
+import numpy as np
+
+from sparse import LinkGraph
+
+# Samples to collect before tallying them
+FLUSH_SIZE = 1 << 22
+
+
+def surf(graph, damping_factor, n, seed=None, surfers=None):
+    """
+    Estimate the PageRank vector of `graph` from about `n` samples taken
+    by many random surfers moving in lockstep.
+
+    Each surfer starts on a random page. At each step it follows a random
+    link on its page with probability `damping_factor` (unless the page
+    has none), and otherwise jumps to a random page. Every jump to a
+    random page starts the walk afresh, so once the sample budget is
+    spent each surfer walks on until its next jump and stops there;
+    tallying only whole walks keeps the estimate unbiased.
+    """
+    rng = np.random.default_rng(seed)
+    pages = len(graph)
+    if surfers is None:
+        surfers = max(1, min(1 << 16, n // 256))
+    steps = -(-n // surfers)
+
+    links = graph.matrix.T.tocsr()
+    starts = links.indptr[:-1]
+    degree = graph.out_degree
+    can_follow = ~graph.dangling
+
+    counts = np.zeros(pages, dtype=np.int64)
+    pending = []
+    pending_size = 0
+
+    position = rng.integers(0, pages, surfers)
+    active = np.ones(surfers, dtype=bool)
+    step = 0
+    while active.any():
+        visited = position[active]
+        pending.append(visited)
+        pending_size += len(visited)
+        if pending_size >= FLUSH_SIZE:
+            counts += np.bincount(np.concatenate(pending), minlength=pages)
+            pending = []
+            pending_size = 0
+
+        follow = (rng.random(surfers) < damping_factor) & can_follow[position]
+        chosen = starts[position] + (
+            rng.random(surfers) * degree[position]
+        ).astype(np.int64)
+        next_position = rng.integers(0, pages, surfers)
+        next_position[follow] = links.indices[chosen[follow]]
+        position = next_position
+
+        # Past the budget, surfers stop at their next random jump
+        step += 1
+        if step >= steps:
+            active &= follow
+
+    if pending:
+        counts += np.bincount(np.concatenate(pending), minlength=pages)
+    return counts / counts.sum()
+
+
+def surfer_pagerank(corpus, damping_factor, n, seed=None):
+    """
+    Return PageRank values for each page by sampling about `n` pages with
+    vectorized random surfers, like `sample_pagerank`.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    return graph.to_dict(surf(graph, damping_factor, n, seed))
@@ -0,0 +1,308 @@
+import time
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+# Stop iterating once the L1 change in ranks is below this
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 1000
+
+# Iterations between extrapolation steps
+EXTRAPOLATION_PERIOD = 10
+
+METHODS = ["jacobi", "gauss_seidel", "aitken", "quadratic"]
+NORMS = {
+    "l1": lambda v: np.abs(v).sum(),
+    "l2": lambda v: np.sqrt(v @ v),
+    "linf": lambda v: np.abs(v).max(initial=0),
+}
+
+
+class LinkGraph():
+    """
+    A corpus as a sparse matrix, ready for ranking.
+
+    Pages are numbered 0..N-1 in the order of `pages`. `matrix` is the
+    N x N CSR matrix whose entry (i, j) is 1 / (number of links on page j)
+    if page j links to page i, so that `matrix @ ranks` spreads each page's
+    rank evenly over its links. `dangling` marks pages with no links.
+    """
+
+    def __init__(self, pages, src, dst):
+        """
+        Build a graph from page names and parallel arrays of link
+        sources and destinations (as page numbers). Duplicate links and
+        links from a page to itself are ignored.
+        """
+        self.pages = list(pages)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        n = len(self.pages)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        keep = src != dst
+        links = scipy.sparse.csr_matrix(
+            (np.ones(keep.sum()), (src[keep], dst[keep])), shape=(n, n)
+        )
+        links.sum_duplicates()
+        links.data[:] = 1
+
+        self.out_degree = np.diff(links.indptr)
+        self.dangling = self.out_degree == 0
+        links.data /= np.repeat(self.out_degree, self.out_degree)
+        self.matrix = links.T.tocsr()
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a graph from a corpus dictionary as returned by `crawl`.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        src = []
+        dst = []
+        for page in pages:
+            for link in corpus[page]:
+                src.append(index[page])
+                dst.append(index[link])
+        return cls(pages, src, dst)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def replace_links(self, links):
+        """
+        Replace the links of some pages. `links` maps a page number to the
+        page numbers it now links to.
+
+        The matrix arrays are copied once, in stretches between the few
+        entries that are dropped or inserted; new entries go at the ends
+        of their rows, so column indices within a row may end up unsorted.
+        """
+        n = len(self.pages)
+        changed = np.zeros(n, dtype=bool)
+        changed[np.fromiter(links, dtype=np.int64, count=len(links))] = True
+
+        new_src = []
+        new_dst = []
+        for page, targets in links.items():
+            targets = set(targets) - {page}
+            self.out_degree[page] = len(targets)
+            new_src.extend([page] * len(targets))
+            new_dst.extend(targets)
+        self.dangling = self.out_degree == 0
+        new_src = np.array(new_src, dtype=np.int64)
+        new_dst = np.array(new_dst, dtype=np.int64)
+        weights = 1 / self.out_degree[new_src]
+
+        matrix = self.matrix
+        dropped = np.flatnonzero(changed[matrix.indices])
+        inserted = matrix.indptr[new_dst + 1]
+        # (position in the old arrays, destination row, new entry or None
+        # to drop one), with drops first and inserts at the same position
+        # in row order, since the rows between them are empty
+        edits = sorted(
+            [(position, -1, None) for position in dropped.tolist()]
+            + list(zip(inserted.tolist(), new_dst.tolist(),
+                       range(len(new_dst))))
+        )
+        data = []
+        indices = []
+        start = 0
+        for position, _, entry in edits:
+            data.append(matrix.data[start:position])
+            indices.append(matrix.indices[start:position])
+            if entry is None:
+                start = position + 1
+            else:
+                data.append(weights[entry:entry + 1])
+                indices.append(new_src[entry:entry + 1])
+                start = max(start, position)
+        data.append(matrix.data[start:])
+        indices.append(matrix.indices[start:])
+
+        rows = np.searchsorted(matrix.indptr, dropped, side="right") - 1
+        change = (np.bincount(new_dst, minlength=n)
+                  - np.bincount(rows, minlength=n))
+        indptr = matrix.indptr + np.concatenate([[0], np.cumsum(change)])
+        self.matrix = scipy.sparse.csr_matrix(
+            (np.concatenate(data), np.concatenate(indices), indptr),
+            shape=(n, n)
+        )
+
+    def step(self, ranks, damping_factor):
+        """
+        Apply the PageRank formula once to a rank vector.
+        Pages with no links spread their rank over every page.
+        """
+        n = len(self.pages)
+        spread = ranks[self.dangling].sum() / n
+        return (
+            damping_factor * (self.matrix @ ranks + spread)
+            + (1 - damping_factor) / n
+        )
+
+    def to_dict(self, ranks):
+        """
+        Return a rank vector as a dictionary keyed by page name.
+        """
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+class Telemetry():
+    """
+    Record of a solver run: the change in ranks after each iteration
+    (in the chosen norm) and the wall time elapsed by then.
+    """
+
+    def __init__(self, method, norm, tolerance):
+        self.method = method
+        self.norm = norm
+        self.tolerance = tolerance
+        self.residuals = []
+        self.times = []
+        self.converged = False
+
+    def record(self, residual, elapsed):
+        self.residuals.append(residual)
+        self.times.append(elapsed)
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+    @property
+    def seconds(self):
+        return self.times[-1] if self.times else 0
+
+    def __str__(self):
+        status = "converged" if self.converged else "did not converge"
+        return (
+            f"{self.method}: {status} in {self.iterations} iterations, "
+            f"{self.seconds:.4f}s, final {self.norm} residual "
+            f"{self.residuals[-1] if self.residuals else 0:.3e}"
+        )
+
+
+def aitken(x0, x1, x2):
+    """
+    Componentwise Aitken delta-squared extrapolation of three iterates.
+    Components whose second difference vanishes are left at `x2`.
+    """
+    first = x2 - x1
+    second = x2 - 2 * x1 + x0
+    safe = np.abs(second) > 1e-300
+    result = x2.copy()
+    result[safe] -= first[safe] ** 2 / second[safe]
+    return result
+
+
+def quadratic(x0, x1, x2, x3):
+    """
+    Quadratic extrapolation of four iterates (Kamvar et al., 2003),
+    which assumes the error lies mostly in the span of the next two
+    eigenvectors of the iteration matrix.
+    """
+    y = np.column_stack([x1 - x0, x2 - x0])
+    gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+    g1, g2, g3 = gamma[0], gamma[1], 1
+    return (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+
+
+def solve(graph, damping_factor, method="jacobi", tolerance=TOLERANCE,
+          norm="l1", ranks=None, max_iterations=MAX_ITERATIONS):
+    """
+    Return a pair (ranks, telemetry): the PageRank vector of `graph` and
+    a Telemetry record of how it was computed.
+
+    `method` is one of:
+        "jacobi": the plain PageRank iteration
+        "gauss_seidel": use each page's new rank as soon as it is known,
+            which takes a sparse triangular solve per iteration; ranks
+            are renormalized after each one
+        "aitken": Jacobi, with Aitken extrapolation every few iterations
+        "quadratic": Jacobi, with quadratic extrapolation every few
+            iterations
+    Iteration starts from `ranks` (uniform if not given) and stops when
+    the change between iterations, measured in `norm` ("l1", "l2" or
+    "linf"), is below `tolerance`.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}")
+    if norm not in NORMS:
+        raise ValueError(f"Unknown norm {norm!r}")
+    measure = NORMS[norm]
+    telemetry = Telemetry(method, norm, tolerance)
+    start = time.perf_counter()
+
+    n = len(graph)
+    d = damping_factor
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+
+    if method == "gauss_seidel":
+        # Solve (I - dL) x' = d (D + U) x + d * spread + (1 - d) / n
+        lower = scipy.sparse.tril(graph.matrix, k=-1, format="csr")
+        upper = scipy.sparse.triu(graph.matrix, k=0, format="csr")
+        system = (scipy.sparse.identity(n, format="csr") - d * lower).tocsr()
+        system.sort_indices()
+
+    history = [ranks]
+    for _ in range(max_iterations):
+        if method == "gauss_seidel":
+            spread = ranks[graph.dangling].sum() / n
+            new_ranks = scipy.sparse.linalg.spsolve_triangular(
+                system, d * (upper @ ranks + spread) + (1 - d) / n,
+                lower=True, unit_diagonal=True, overwrite_b=True
+            )
+            new_ranks /= new_ranks.sum()
+        else:
+            new_ranks = graph.step(ranks, d)
+
+        # Extrapolate from recent iterates every few iterations
+        history = (history + [new_ranks])[-4:]
+        if (method in ("aitken", "quadratic")
+                and telemetry.iterations % EXTRAPOLATION_PERIOD
+                == EXTRAPOLATION_PERIOD - 1):
+            if method == "aitken" and len(history) >= 3:
+                extrapolated = aitken(*history[-3:])
+            elif method == "quadratic" and len(history) == 4:
+                extrapolated = quadratic(*history)
+            else:
+                extrapolated = None
+            # Keep the extrapolation only if it is closer to converging
+            if extrapolated is not None and (extrapolated >= 0).all():
+                extrapolated /= extrapolated.sum()
+                gain = measure(graph.step(extrapolated, d) - extrapolated)
+                if gain < measure(new_ranks - ranks):
+                    new_ranks = extrapolated
+                    history = [new_ranks]
+
+        change = measure(new_ranks - ranks)
+        ranks = new_ranks
+        telemetry.record(change, time.perf_counter() - start)
+        if change < tolerance:
+            telemetry.converged = True
+            break
+
+    return ranks / ranks.sum(), telemetry
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                    ranks=None):
+    """
+    Return the PageRank vector of `graph`, starting from `ranks`
+    (uniform if not given) and iterating until the L1 change between
+    iterations is below `tolerance`.
+    """
+    ranks, _ = solve(graph, damping_factor, "jacobi", tolerance, "l1", ranks)
+    return ranks
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page of `corpus`, like
+    `iterate_pagerank`, using sparse matrix-vector products.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    return graph.to_dict(power_iteration(graph, damping_factor, tolerance))
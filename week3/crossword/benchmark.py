@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+STRUCTURES = [
+    "data/structure0.txt",
+    "data/structure1.txt",
+    "data/structure2.txt",
+]
+
+WORDS = "data/words2.txt"
+
+# Search options to compare: (name, keyword arguments to `solve`)
+CONFIGS = [
+    ("chronological", {"backjumping": False}),
+    ("backjumping", {}),
+    ("backjumping + restarts", {"restarts": True}),
+]
+
+# Nodes searched before a run gives up
+MAX_NODES = 10000
+
+
+def generate_structure(size, seed=0, density=0.35):
+    """
+    Return the text of a random `size` by `size` crossword structure,
+    symmetric under half-turn rotation like published grids, with about
+    a `density` share of blocked cells.
+    """
+    rng = random.Random(seed)
+    open_cells = [[True] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(size):
+            rotated = (size - 1 - i, size - 1 - j)
+            if (i, j) <= rotated and rng.random() < density:
+                open_cells[i][j] = False
+                open_cells[rotated[0]][rotated[1]] = False
+    return "".join(
+        "".join("_" if cell else "#" for cell in row) + "\n"
+        for row in open_cells
+    )
+
+
+def run(crossword, options, max_nodes=MAX_NODES):
+    """
+    Solve `crossword` with the given `solve` options.
+    Return a description of the outcome, the search statistics and the
+    time taken.
+    """
+    creator = CrosswordCreator(crossword)
+    start = time.perf_counter()
+    assignment = creator.solve(max_nodes=max_nodes, **options)
+    seconds = time.perf_counter() - start
+    if assignment is not None:
+        outcome = "solved"
+    elif creator.stats["limited"]:
+        outcome = "gave up"
+    else:
+        outcome = "no solution"
+    return outcome, creator.stats, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare crossword search strategies."
+    )
+    parser.add_argument("--words", default=WORDS)
+    parser.add_argument("--size", type=int, default=11,
+                        help="size of the generated structure")
+    parser.add_argument("--density", type=float, default=0.35,
+                        help="share of blocked cells in the generated "
+                             "structure")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-nodes", type=int, default=MAX_NODES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generated = os.path.join(directory, "generated.txt")
+        with open(generated, "w") as f:
+            f.write(generate_structure(args.size, args.seed, args.density))
+        structures = [(path, path) for path in STRUCTURES]
+        structures.append((
+            f"generated {args.size}x{args.size}, seed {args.seed}",
+            generated
+        ))
+
+        for name, path in structures:
+            crossword = Crossword(path, args.words)
+            print(f"{name}: {len(crossword.variables)} variables")
+            for config, options in CONFIGS:
+                outcome, stats, seconds = run(
+                    crossword, options, args.max_nodes
+                )
+                print(f"  {config}: {outcome} in {seconds:.2f}s, "
+                      f"{stats['nodes']} nodes, "
+                      f"{stats['backjumps']} backjumps, "
+                      f"{stats['learned']} nogoods learned, "
+                      f"{stats['pruned']} pruned by nogoods, "
+                      f"{stats['restarts']} restarts")
+
+
+if __name__ == "__main__":
+    main()
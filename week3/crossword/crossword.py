@@ -1,3 +1,6 @@
+from wordcache import load_words
+
+
 class Variable():
 
     ACROSS = "across"
@@ -57,10 +60,6 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
-
         # Determine variable set
         self.variables = set()
         for i in range(self.height):
@@ -104,30 +103,47 @@ class Crossword():
                             length=length
                         ))
 
+        # Save vocabulary list, keeping only words of the lengths needed
+        self.words = load_words(
+            words_file, {variable.length for variable in self.variables}
+        )
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only overlapping pairs are stored; other pairs look up as None
+        self.cell_variables = dict()
+        for variable in self.variables:
+            for k, cell in enumerate(variable.cells):
+                self.cell_variables.setdefault(cell, []).append(
+                    (variable, k)
+                )
+        self.overlaps = Overlaps()
+        for crossing in self.cell_variables.values():
+            for v1, k1 in crossing:
+                for v2, k2 in crossing:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (k1, k2)
+
+        self._neighbors = {variable: set() for variable in self.variables}
+        for v1, v2 in self.overlaps:
+            self._neighbors[v1].add(v2)
+        self._neighbors = {
+            variable: frozenset(neighbors)
+            for variable, neighbors in self._neighbors.items()
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self._neighbors[var]
+
+
+class Overlaps(dict):
+    """
+    Overlaps between pairs of variables, holding only the pairs that
+    overlap; looking up any other pair gives None.
+    """
+
+    def __missing__(self, key):
+        return None
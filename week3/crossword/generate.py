@@ -1,5 +1,24 @@
+import random
 import sys
 from crossword import *
+from wordindex import BitDomain, WordIndex
+
+# Learned nogoods kept at most; the least recently used go first
+NOGOOD_LIMIT = 10000
+
+# Nogoods involving more assignments than this are not kept
+NOGOOD_SIZE = 8
+
+# Nodes searched before the first restart, and the factor by which the
+# limit grows after each restart
+RESTART_NODES = 100
+RESTART_GROWTH = 1.5
+
+
+class Restart(Exception):
+    """
+    Raised when a search run uses up its node limit.
+    """
 
 
 class CrosswordCreator():
@@ -9,11 +28,46 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+        self.index = WordIndex(self.crossword.words)
         self.domains = {
-            var: self.crossword.words.copy()
+            var: BitDomain(self.index, self.index.length_mask(var.length))
             for var in self.crossword.variables
         }
 
+        # Assigned variables whose words explain the values missing from
+        # each domain, beyond those ruled out before search
+        self.reasons = {
+            var: frozenset() for var in self.crossword.variables
+        }
+
+        # Domains and reasons as they were before each revision made
+        # during search, as (variable, mask, reasons) triples, so that
+        # revisions can be undone
+        self.trail = []
+
+        # Learned nogoods: sets of (variable, word) assignments that no
+        # solution contains, in order of last use, and the nogoods that
+        # contain each assignment
+        self.nogoods = dict()
+        self.watches = dict()
+
+        # Search options, set by `solve`
+        self.backjumping = True
+        self.random = None
+        self.node_limit = None
+
+        # Variable whose domain was emptied when `ac3` last failed
+        self.wiped = None
+
+        self.stats = {
+            "nodes": 0, "backjumps": 0, "learned": 0, "pruned": 0,
+            "restarts": 0, "limited": False,
+        }
+
+        # Letter counts of domains at overlap positions, keyed by
+        # (variable, position), with the domain mask they were counted on
+        self.histograms = dict()
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -84,13 +138,45 @@ class CrosswordCreator():
 
         img.save(filename)
 
-    def solve(self):
+    def solve(self, backjumping=True, restarts=False, seed=None,
+              max_nodes=None):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        With `backjumping`, the search jumps back over assignments that
+        played no part in a failure and learns nogoods; without it, it
+        backtracks chronologically. With `restarts`, ties in variable
+        and value ordering are broken at random (seeded by `seed`), and
+        the search starts over, keeping what it learned, whenever it
+        uses up a node limit that grows with each restart.
+
+        If `max_nodes` is given, give up after searching that many nodes
+        in all, returning None with `self.stats["limited"]` set.
         """
+        self.stats["limited"] = False
         self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        if not self.ac3():
+            return None
+        self.trail.clear()
+        self.backjumping = backjumping
+        self.random = random.Random(seed) if restarts else None
+
+        limit = RESTART_NODES
+        while True:
+            self.node_limit = max_nodes
+            if restarts:
+                run_limit = self.stats["nodes"] + int(limit)
+                if max_nodes is None or run_limit < max_nodes:
+                    self.node_limit = run_limit
+            try:
+                return self.backtrack(dict())
+            except Restart:
+                self.undo(0)
+            if max_nodes is not None and self.stats["nodes"] >= max_nodes:
+                self.stats["limited"] = True
+                return None
+            self.stats["restarts"] += 1
+            limit *= RESTART_GROWTH
 
     def enforce_node_consistency(self):
         """
@@ -99,9 +185,9 @@ class CrosswordCreator():
          constraints; in this case, the length of the word.)
         """
         for variable in self.crossword.variables:
-            for word in self.crossword.words:
-                if len(word) != variable.length:
-                    self.domains[variable].remove(word)
+            self.domains[variable].mask &= self.index.length_mask(
+                variable.length
+            )
 
     def revise(self, x, y):
         """
@@ -112,24 +198,22 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        import copy
-        overlapIndex = self.crossword.overlaps[x, y] #figure out what to remove
-        revised = False
-        doms = copy.deepcopy(self.domains)
-        if overlapIndex:
-            x_o, y_o = overlapIndex
-            for x_val in doms[x]:
-                match_ = False
-                for y_val in doms[y]:
-                    if x_val[x_o] == y_val[y_o]:
-                        match_ = True
-                        break
-                if match_ == True:
-                    continue
-                else:
-                    self.domains[x].remove(x_val)
-                    revised = True   
-        return revised                                    
+        overlap = self.crossword.overlaps[x, y]
+        if not overlap:
+            return False
+
+        # Words of x whose overlapping letter some word of y shares
+        x_o, y_o = overlap
+        domain = self.domains[x]
+        supported = domain.mask & self.index.support(
+            self.domains[y].mask, y.length, y_o, x.length, x_o
+        )
+        if supported == domain.mask:
+            return False
+        self.trail.append((x, domain.mask, self.reasons[x]))
+        domain.mask = supported
+        self.reasons[x] = self.reasons[x] | self.reasons[y]
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -138,7 +222,8 @@ class CrosswordCreator():
         Otherwise, use `arcs` as the initial list of arcs to make consistent.
 
         Return True if arc consistency is enforced and no domains are empty;
-        return False if one or more domains end up empty.
+        return False if one or more domains end up empty, leaving that
+        variable in `self.wiped`.
         """
         #finally read the lecture notes lol
         from collections import deque
@@ -154,6 +239,7 @@ class CrosswordCreator():
             x, y = arcs.pop()
             if self.revise(x, y): 
                 if len(self.domains[x]) == 0:
+                    self.wiped = x
                     return False
                 for z in self.crossword.neighbors(x) - {y}:
                     arcs.appendleft((z, x))
@@ -194,6 +280,71 @@ class CrosswordCreator():
                             return False
         return True
 
+    def conflicts(self, var, word, assignment, used):
+        """
+        Return the set of variables in `assignment` whose words rule out
+        assigning `word` to `var`, where `used` maps each word already
+        assigned to its variable. Only the overlaps with `var`'s
+        neighbors are checked.
+        """
+        culprits = set()
+        if word in used:
+            culprits.add(used[word])
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                x, y = self.crossword.overlaps[var, neighbor]
+                if word[x] != assignment[neighbor][y]:
+                    culprits.add(neighbor)
+        return culprits
+
+    def undo(self, mark):
+        """
+        Undo the domain revisions recorded on the trail since it had
+        `mark` entries.
+        """
+        while len(self.trail) > mark:
+            variable, mask, reasons = self.trail.pop()
+            self.domains[variable].mask = mask
+            self.reasons[variable] = reasons
+
+    def learn(self, conflict, assignment):
+        """
+        Record that the words `assignment` gives to the variables in
+        `conflict` cannot all be part of a solution, evicting the least
+        recently used nogood if the store is full.
+        """
+        if not conflict or len(conflict) > NOGOOD_SIZE:
+            return
+        nogood = frozenset((var, assignment[var]) for var in conflict)
+        if nogood in self.nogoods:
+            return
+        if len(self.nogoods) >= NOGOOD_LIMIT:
+            oldest = next(iter(self.nogoods))
+            del self.nogoods[oldest]
+            for pair in oldest:
+                self.watches[pair].discard(oldest)
+        self.nogoods[nogood] = None
+        for pair in nogood:
+            self.watches.setdefault(pair, set()).add(nogood)
+        self.stats["learned"] += 1
+
+    def nogood_conflicts(self, var, word, assignment):
+        """
+        Return the other variables of a learned nogood that assigning
+        `word` to `var` would complete, or None if there is no such
+        nogood.
+        """
+        for nogood in self.watches.get((var, word), ()):
+            if all(
+                other == var or assignment.get(other) == value
+                for other, value in nogood
+            ):
+                # Mark the nogood as recently used
+                del self.nogoods[nogood]
+                self.nogoods[nogood] = None
+                return {other for other, _ in nogood if other != var}
+        return None
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -201,26 +352,41 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        neighbours = self.crossword.neighbors(var)
-        for variable in assignment:
-            if variable in neighbours: #we do not care about it if its already done
-                neighbours.remove(variable)
-
-        number_of_words_kicked = {}
-        for variable in self.domains[var]:
-            booted = 0
-            for neighbour in neighbours:
-                for variable2 in self.domains[neighbour]:
-                    overlap = self.crossword.overlaps[var, neighbour]
-                    if overlap:
-                        x, y = overlap
-                        if variable[x] != variable2[y]:
-                            booted += 1
-            number_of_words_kicked[variable] = booted
-        number_of_words_kicked = sorted(number_of_words_kicked.items(), key=lambda x: x[1])
-        words_sorted = [key[0] for key in number_of_words_kicked]
-        return words_sorted
-        
+        # We do not care about neighbours that are already assigned.
+        # A word rules out the neighbour's values that have a different
+        # letter where the two cross
+        tables = []
+        for neighbour in self.crossword.neighbors(var):
+            if neighbour not in assignment:
+                x, y = self.crossword.overlaps[var, neighbour]
+                size = len(self.domains[neighbour])
+                tables.append((x, size, self.letter_counts(neighbour, y)))
+
+        def booted(word):
+            return sum(
+                size - counts.get(word[x], 0) for x, size, counts in tables
+            )
+
+        if self.random is not None:
+            keys = {word: (booted(word), self.random.random())
+                    for word in self.domains[var]}
+            return sorted(keys, key=keys.get)
+        return sorted(self.domains[var], key=booted)
+
+    def letter_counts(self, var, position):
+        """
+        Return how many words in the domain of `var` have each letter at
+        `position`, counting again only if the domain has changed since
+        the last call.
+        """
+        mask = self.domains[var].mask
+        cached = self.histograms.get((var, position))
+        if cached is not None and cached[0] == mask:
+            return cached[1]
+        counts = self.index.histogram(mask, var.length, position)
+        self.histograms[var, position] = (mask, counts)
+        return counts
+
     def select_unassigned_variable(self, assignment):
         """
         Return an unassigned variable not already part of `assignment`.
@@ -234,30 +400,100 @@ class CrosswordCreator():
             if variable not in assignment:
                 unassigned.append([variable, len(self.domains[variable]), len(self.crossword.neighbors(variable))])
         if len(unassigned)>0:
-            unassigned.sort(key=lambda x: (x[1], -x[2]))
+            if self.random is not None:
+                for entry in unassigned:
+                    entry.append(self.random.random())
+            unassigned.sort(key=lambda x: (x[1], -x[2], x[3:]))
             return unassigned[0][0]
 
         return None
 
-    def backtrack(self, assignment):
+    def backtrack(self, assignment, used=None):
         """
         Using Backtracking Search, take as input a partial assignment for the
         crossword and return a complete assignment if possible to do so.
 
         `assignment` is a mapping from variables (keys) to words (values).
 
+        `used` maps each word in `assignment` to its variable, and is kept
+        up to date during the search.
+
+        Domains are kept arc consistent with each assignment; revisions
+        are recorded on `self.trail` and undone on backtracking.
+
         If no assignment is possible, return None.
         """
+        if used is None:
+            used = {word: var for var, word in assignment.items()}
+        result, _ = self.search(assignment, used)
+        return result
+
+    def search(self, assignment, used):
+        """
+        Extend `assignment` to a complete one, as in `backtrack`.
+
+        Return a tuple (assignment, conflict). On failure, the
+        assignment is None and the conflict is the set of assigned
+        variables whose words, together, leave no way to complete the
+        assignment. With backjumping, search returns straight past
+        variables that are not in the conflict.
+        """
         if self.assignment_complete(assignment):
-            return assignment
+            return assignment, set()
+        self.stats["nodes"] += 1
+        if (self.node_limit is not None
+                and self.stats["nodes"] > self.node_limit):
+            raise Restart()
+
         variable = self.select_unassigned_variable(assignment)
+        conflict = set()
         for val in self.order_domain_values(variable, assignment):
+            culprits = self.conflicts(variable, val, assignment, used)
+            if not culprits and self.backjumping:
+                culprits = self.nogood_conflicts(variable, val, assignment)
+                if culprits is not None:
+                    self.stats["pruned"] += 1
+            if culprits:
+                conflict |= culprits
+                continue
             assignment[variable] = val
-            if self.consistent(assignment):
-                result = self.backtrack(assignment)
-                if result is None: assignment[variable] = None
-                else: return result
-        return None
+            used[val] = variable
+
+            # Maintain arc consistency: narrow the variable's domain to
+            # its value and propagate to its unassigned neighbors
+            mark = len(self.trail)
+            domain = self.domains[variable]
+            self.trail.append(
+                (variable, domain.mask, self.reasons[variable])
+            )
+            domain.mask = 1 << self.index.ids[val]
+            self.reasons[variable] = self.reasons[variable] | {variable}
+            arcs = [
+                (neighbor, variable)
+                for neighbor in self.crossword.neighbors(variable)
+                if neighbor not in assignment
+            ]
+            if self.ac3(arcs):
+                result, failure = self.search(assignment, used)
+                if result is not None:
+                    return result, failure
+            else:
+                failure = self.reasons[self.wiped]
+
+            self.undo(mark)
+            del used[val]
+            del assignment[variable]
+            if self.backjumping and variable not in failure:
+                # This variable's word played no part in the failure
+                self.stats["backjumps"] += 1
+                return None, failure
+            conflict |= failure - {variable}
+
+        # Values missing from the domain were ruled out by other words
+        conflict |= self.reasons[variable]
+        if self.backjumping:
+            self.learn(conflict, assignment)
+        return None, conflict
 
 
 def main():
@@ -0,0 +1,123 @@
+import argparse
+import multiprocessing
+import queue
+import sys
+import time
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+# Default wall-clock limit for the whole portfolio, in seconds
+TIME_LIMIT = 60.0
+
+
+def default_configs(count):
+    """
+    Return `count` search configurations as (name, keyword arguments to
+    `solve`) pairs: deterministic backjumping and chronological search,
+    then randomized restarts with different seeds.
+    """
+    configs = [
+        ("backjumping", {}),
+        ("chronological", {"backjumping": False}),
+    ]
+    configs += [
+        (f"restarts, seed {seed}", {"restarts": True, "seed": seed})
+        for seed in range(count - len(configs))
+    ]
+    return configs[:count]
+
+
+def _solve(crossword, name, options, results):
+    """
+    Solve `crossword` with one configuration and put a tuple (name,
+    assignment, stats) on the `results` queue.
+    """
+    creator = CrosswordCreator(crossword)
+    assignment = creator.solve(**options)
+    results.put((name, assignment, creator.stats))
+
+
+def portfolio(crossword, configs=None, time_limit=TIME_LIMIT):
+    """
+    Solve `crossword` with several configurations at once, one process
+    each, defaulting to one configuration per CPU.
+
+    The first worker to finish its search decides the result: either a
+    complete assignment, or proof that there is none. The remaining
+    workers are then terminated, as are all of them once `time_limit`
+    seconds have passed.
+
+    Return a tuple (assignment, winner, stats), where `winner` names
+    the deciding configuration and `stats` holds its search statistics.
+    If no worker finished in time, all three are None.
+    """
+    if configs is None:
+        configs = default_configs(multiprocessing.cpu_count())
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_solve, args=(crossword, name, options, results),
+            daemon=True
+        )
+        for name, options in configs
+    ]
+    deadline = time.perf_counter() + time_limit
+    for worker in workers:
+        worker.start()
+
+    try:
+        for _ in workers:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                name, assignment, stats = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if assignment is not None or not stats["limited"]:
+                return assignment, name, stats
+        return None, None, None
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a crossword with a portfolio of searches."
+    )
+    parser.add_argument("structure")
+    parser.add_argument("words")
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of configurations to run")
+    parser.add_argument("--seconds", type=float, default=TIME_LIMIT,
+                        help="time limit for the whole run")
+    args = parser.parse_args()
+
+    crossword = Crossword(args.structure, args.words)
+    configs = default_configs(
+        args.processes or multiprocessing.cpu_count()
+    )
+    start = time.perf_counter()
+    assignment, winner, stats = portfolio(crossword, configs, args.seconds)
+    seconds = time.perf_counter() - start
+
+    if winner is None:
+        sys.exit(f"No configuration finished within {args.seconds:g}s.")
+    print(f"{winner} finished first in {seconds:.2f}s, "
+          f"{stats['nodes']} nodes")
+    if assignment is None:
+        print("No solution.")
+        return
+    creator = CrosswordCreator(crossword)
+    creator.print(assignment)
+    if args.output:
+        creator.save(assignment, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+import struct
+import sys
+
+# File layout: magic, the size and modification time of the word list
+# the cache was built from, and the number of buckets; then a table
+# entry per bucket (word length, number of words, byte length); then
+# each bucket's words, UTF-8 encoded and separated by newlines
+MAGIC = b"CWWORDS1"
+HEADER = struct.Struct("<8s2QI")
+ENTRY = struct.Struct("<3I")
+
+EXTENSION = ".wordcache"
+
+
+def cache_path(words_file):
+    """
+    Return the path of the cache for a word list file.
+    """
+    return os.path.splitext(words_file)[0] + EXTENSION
+
+
+def read_words(words_file):
+    """
+    Read a word list file, one word per line, into a set of uppercase
+    words.
+    """
+    with open(words_file) as f:
+        return set(f.read().upper().splitlines())
+
+
+def save_cache(path, words, size, mtime):
+    """
+    Write `words` to a cache at `path`, bucketed by length, recording
+    the `size` and `mtime` (in nanoseconds) of the word list they came
+    from. The file is replaced atomically.
+    """
+    buckets = {}
+    for word in words:
+        buckets.setdefault(len(word), []).append(word)
+    data = {
+        length: "\n".join(sorted(bucket)).encode()
+        for length, bucket in buckets.items()
+    }
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, size, mtime, len(buckets)))
+        for length in sorted(buckets):
+            f.write(ENTRY.pack(
+                length, len(buckets[length]), len(data[length])
+            ))
+        for length in sorted(buckets):
+            f.write(data[length])
+    os.replace(temporary, path)
+
+
+def load_cache(path, size, mtime, lengths=None):
+    """
+    Read the buckets for `lengths` (all of them if None) from the cache
+    at `path`, and return them as a dictionary from length to list of
+    words. Return None if there is no valid cache for a word list of
+    the given `size` and `mtime`.
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, cached_size, cached_mtime, count = HEADER.unpack(
+                f.read(HEADER.size)
+            )
+            if (magic, cached_size, cached_mtime) != (MAGIC, size, mtime):
+                return None
+            table = f.read(ENTRY.size * count)
+            offset = HEADER.size + len(table)
+            buckets = {}
+            for length, words, nbytes in ENTRY.iter_unpack(table):
+                if lengths is None or length in lengths:
+                    f.seek(offset)
+                    bucket = f.read(nbytes).decode().split("\n")
+                    if len(bucket) != words:
+                        return None
+                    buckets[length] = bucket
+                offset += nbytes
+            return buckets
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def load_words(words_file, lengths=None):
+    """
+    Return the set of words in a word list file with one of the given
+    `lengths` (every word if None).
+
+    Words are read from the file's cache, which is built or rebuilt on
+    first use after the word list changes. Only the buckets for the
+    requested lengths are read. If the cache cannot be written, the
+    word list is read directly.
+    """
+    stat = os.stat(words_file)
+    path = cache_path(words_file)
+    buckets = load_cache(path, stat.st_size, stat.st_mtime_ns, lengths)
+    if buckets is not None:
+        return {word for bucket in buckets.values() for word in bucket}
+
+    words = read_words(words_file)
+    try:
+        save_cache(path, words, stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        pass
+    if lengths is None:
+        return words
+    return {word for word in words if len(word) in lengths}
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python wordcache.py words [words ...]")
+    for words_file in sys.argv[1:]:
+        stat = os.stat(words_file)
+        words = read_words(words_file)
+        path = cache_path(words_file)
+        save_cache(path, words, stat.st_size, stat.st_mtime_ns)
+        print(f"Cached {len(words)} words from {words_file} in {path} "
+              f"({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
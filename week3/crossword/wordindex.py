@@ -0,0 +1,145 @@
+class WordIndex():
+    """
+    A vocabulary with every word numbered, so that sets of words can be
+    stored as integer bitsets: bit k is set if word k is in the set.
+
+    Words are numbered in order of length, so the words of each length
+    occupy one run of bits. For every word length, position and letter,
+    the index keeps the bitset of words of that length with that letter
+    at that position.
+    """
+
+    def __init__(self, words):
+        self.words = sorted(words, key=lambda word: (len(word), word))
+        self.ids = {word: i for i, word in enumerate(self.words)}
+
+        # Words of each length have consecutive numbers
+        self.lengths = {}
+        for i, word in enumerate(self.words):
+            self.lengths[len(word)] = self.lengths.get(len(word), 0) + 1
+        start = 0
+        for length, count in self.lengths.items():
+            self.lengths[length] = ((1 << count) - 1) << start
+            start += count
+
+        # Set bits in byte arrays first; growing an int one bit at a
+        # time would copy it for every word
+        arrays = {}
+        size = (len(self.words) + 7) // 8
+        for i, word in enumerate(self.words):
+            byte, bit = i >> 3, 1 << (i & 7)
+            for position, letter in enumerate(word):
+                key = (len(word), position, letter)
+                array = arrays.get(key)
+                if array is None:
+                    array = arrays[key] = bytearray(size)
+                array[byte] |= bit
+        self.letters = {}
+        for key in list(arrays):
+            self.letters[key] = int.from_bytes(arrays.pop(key), "little")
+
+        # Letters seen at each (length, position)
+        self.alphabet = {}
+        for length, position, letter in self.letters:
+            self.alphabet.setdefault((length, position), []).append(letter)
+
+    def __len__(self):
+        return len(self.words)
+
+    def length_mask(self, length):
+        """
+        Return the bitset of all words with `length` letters.
+        """
+        return self.lengths.get(length, 0)
+
+    def letter_mask(self, length, position, letter):
+        """
+        Return the bitset of words with `length` letters that have
+        `letter` at `position`.
+        """
+        return self.letters.get((length, position, letter), 0)
+
+    def support(self, mask, length, position, other_length, other_position):
+        """
+        Return the bitset of words with `other_length` letters whose
+        letter at `other_position` matches the letter at `position` of
+        some word in `mask`, all of whose words have `length` letters.
+        """
+        support = 0
+        for letter in self.alphabet.get((length, position), ()):
+            if mask & self.letters[length, position, letter]:
+                support |= self.letter_mask(
+                    other_length, other_position, letter
+                )
+        return support
+
+    def histogram(self, mask, length, position):
+        """
+        Return a dictionary mapping each letter to the number of words
+        in `mask`, all of which have `length` letters, with that letter
+        at `position`. Letters that no word has are left out.
+        """
+        counts = {}
+        for letter in self.alphabet.get((length, position), ()):
+            count = (mask & self.letters[length, position, letter]).bit_count()
+            if count:
+                counts[letter] = count
+        return counts
+
+    def to_words(self, mask):
+        """
+        Yield the words in a bitset, in order of their numbers.
+        """
+        while mask:
+            low = mask & -mask
+            yield self.words[low.bit_length() - 1]
+            mask ^= low
+
+
+class BitDomain():
+    """
+    A set of words from a WordIndex, stored as a bitset.
+
+    Supports the set operations the solver needs (length, iteration,
+    membership, add, remove, copy), so that it can stand in for a set
+    of words.
+    """
+
+    __slots__ = ("index", "mask")
+
+    def __init__(self, index, mask=0):
+        self.index = index
+        self.mask = mask
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __iter__(self):
+        return self.index.to_words(self.mask)
+
+    def __contains__(self, word):
+        i = self.index.ids.get(word)
+        return i is not None and bool(self.mask >> i & 1)
+
+    def __eq__(self, other):
+        if isinstance(other, BitDomain):
+            return self.mask == other.mask
+        return set(self) == set(other)
+
+    def __repr__(self):
+        return f"BitDomain({set(self)!r})"
+
+    def add(self, word):
+        self.mask |= 1 << self.index.ids[word]
+
+    def remove(self, word):
+        if word not in self:
+            raise KeyError(word)
+        self.mask ^= 1 << self.index.ids[word]
+
+    def discard(self, word):
+        if word in self:
+            self.mask ^= 1 << self.index.ids[word]
+
+    def copy(self):
+        return BitDomain(self.index, self.mask)